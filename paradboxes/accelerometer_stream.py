@@ -0,0 +1,264 @@
+"""
+Stream samples from the LIS3DH Accelerometer through its 32 sample FIFO. The FIFO runs in stream\
+mode, so the chip keeps sampling at its data rate on its own and every read empties it in one\
+I2C burst. Reading at least once per 32 samples loses nothing, and reading when the FIFO is\
+nearly full keeps the bus quiet: at the default 100 samples per second that is about 3.6 reads,\
+or 7 I2C transactions, a second. Samples come out as NumPy arrays, and taps are found in software\
+over the whole window instead of from the chip's one bit flag. ActionEvents.add_tap_stream runs\
+the reads and the detection from its event loop.
+
+Classes:
+
+AccelerometerStream(i2c, address=0x18, data_rate=100, g_range=2)
+TapDetector(data_rate, threshold=0.5, min_gap=0.08)
+
+Functions:
+
+group_taps(times, max_interval=0.5)
+"""
+
+import time
+import numpy as np
+from paradboxes import log
+
+logger = log.get_logger("accelerometer_stream")
+
+
+class AccelerometerStream:
+    """
+    Put the LIS3DH FIFO in stream mode and read it in bursts. The chip is set to high resolution\
+    mode with block data update, so a sample's three axes always belong together.
+
+    :param i2c : busio.I2C object
+    :param address : I2C address of the accelerometer. Defaults to 0x18
+    :param data_rate : samples per second, one of 1, 10, 25, 50, 100, 200, 400 or 1344. Defaults to 100
+    :param g_range : measuring range in g, one of 2, 4, 8 or 16. Defaults to 2
+    """
+
+    _CTRL_REG1 = 0x20
+    _CTRL_REG4 = 0x23
+    _CTRL_REG5 = 0x24
+    _OUT_X_L = 0x28
+    _FIFO_CTRL_REG = 0x2E
+    _FIFO_SRC_REG = 0x2F
+
+    # Reading more than one register needs the top bit of the address set
+    _AUTO_INCREMENT = 0x80
+    _FIFO_EN = 0x40
+    _BYPASS_MODE = 0x00
+    _STREAM_MODE = 0x80
+    _BDU = 0x80
+    _HR = 0x08
+    _XYZ_ENABLE = 0x07
+    _FIFO_OVERRUN = 0x40
+    _FIFO_EMPTY = 0x20
+    _FIFO_SAMPLES = 0x1F
+    _FIFO_SIZE = 32
+    # Samples of room left when read_interval comes up, to absorb a late read
+    _READ_MARGIN = 4
+
+    _DATA_RATES = {1: 0x1, 10: 0x2, 25: 0x3, 50: 0x4, 100: 0x5, 200: 0x6, 400: 0x7, 1344: 0x9}
+    _RANGES = {2: 0x0, 4: 0x1, 8: 0x2, 16: 0x3}
+    # g per count of the 12 bit high resolution output
+    _SENSITIVITY = {2: 0.001, 4: 0.002, 8: 0.004, 16: 0.012}
+
+    def __init__(self, i2c, address=0x18, data_rate=100, g_range=2):
+
+        log.configure()
+        if data_rate not in self._DATA_RATES:
+            raise ValueError("data_rate must be one of {}".format(sorted(self._DATA_RATES)))
+        if g_range not in self._RANGES:
+            raise ValueError("g_range must be one of {}".format(sorted(self._RANGES)))
+
+        # Imported here so TapDetector and group_taps work without the board libraries
+        from adafruit_bus_device.i2c_device import I2CDevice
+        self.device = I2CDevice(i2c, address)
+        self.data_rate = data_rate
+        self.g_range = g_range
+        self.overruns = 0
+        self.transactions = 0
+        self.__buffer = bytearray(6 * self._FIFO_SIZE)
+        self.__register = bytearray(1)
+        self.__last_read = None
+
+    def __write_register(self, register, value):
+
+        with self.device as device:
+            device.write(bytes([register, value]))
+        self.transactions += 1
+
+    def __read_register(self, register):
+
+        with self.device as device:
+            device.write_then_readinto(bytes([register]), self.__register)
+        self.transactions += 1
+        return self.__register[0]
+
+    def start(self):
+        """
+        Set the data rate and range, and put the FIFO in stream mode. Samples from before are thrown away
+        """
+
+        self.__write_register(self._CTRL_REG1, self._DATA_RATES[self.data_rate] << 4 | self._XYZ_ENABLE)
+        self.__write_register(self._CTRL_REG4, self._BDU | self._RANGES[self.g_range] << 4 | self._HR)
+        # Keep the interrupt latch bits set_tap may have set
+        self.__write_register(self._CTRL_REG5, self.__read_register(self._CTRL_REG5) | self._FIFO_EN)
+        # Going through bypass mode empties the FIFO
+        self.__write_register(self._FIFO_CTRL_REG, self._BYPASS_MODE)
+        self.__write_register(self._FIFO_CTRL_REG, self._STREAM_MODE)
+        self.__last_read = time.monotonic()
+        logger.info("Started streaming the accelerometer at %d samples per second", self.data_rate)
+
+    def stop(self):
+        """
+        Take the FIFO out of stream mode
+        """
+
+        self.__write_register(self._FIFO_CTRL_REG, self._BYPASS_MODE)
+        self.__write_register(self._CTRL_REG5, self.__read_register(self._CTRL_REG5) & ~self._FIFO_EN)
+        logger.info("Stopped streaming the accelerometer")
+
+    def available(self):
+        """
+        Get the amount of samples waiting in the FIFO
+        """
+
+        source = self.__read_register(self._FIFO_SRC_REG)
+        if source & self._FIFO_EMPTY:
+            return 0
+        if source & self._FIFO_OVERRUN:
+            # The flag goes up as soon as the FIFO is full, which is not a loss yet. Samples were only
+            # overwritten when more time has passed since the last read than the FIFO holds
+            if self.__last_read is not None and \
+                    (time.monotonic() - self.__last_read) * self.data_rate > self._FIFO_SIZE + 1:
+                self.overruns += 1
+                logger.warning("Accelerometer FIFO overran, read it at least every %.3fs",
+                               self._FIFO_SIZE / self.data_rate)
+            return self._FIFO_SIZE
+        return source & self._FIFO_SAMPLES
+
+    def read(self):
+        """
+        Read every sample waiting in the FIFO, in two I2C transactions
+
+        :return : float array of [x, y, z] accelerations in g, shape (samples, 3), oldest first
+        """
+
+        count = self.available()
+        if count == 0:
+            return np.empty((0, 3))
+        view = memoryview(self.__buffer)[:6 * count]
+        with self.device as device:
+            device.write_then_readinto(bytes([self._OUT_X_L | self._AUTO_INCREMENT]), view)
+        self.transactions += 1
+        self.__last_read = time.monotonic()
+        # 12 bit values, left aligned in little endian 16 bit words
+        raw = np.frombuffer(view, dtype="<i2").reshape(count, 3) >> 4
+        return raw * self._SENSITIVITY[self.g_range]
+
+    @property
+    def read_interval(self):
+        """
+        Seconds between reads that keeps the bus quiet and loses nothing: the time the FIFO takes\
+        to fill, less a few samples of margin
+        """
+
+        return (self._FIFO_SIZE - self._READ_MARGIN) / self.data_rate
+
+    def windows(self, interval=None):
+        """
+        Read the FIFO every interval, forever
+
+        :param interval : seconds between reads. Defaults to None, which is read_interval
+        :return : generator of (samples, time.monotonic() time of the newest sample) tuples
+        """
+
+        if interval is None:
+            interval = self.read_interval
+        deadline = time.monotonic()
+        while True:
+            samples = self.read()
+            yield samples, time.monotonic()
+            deadline += interval
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            else:
+                deadline = time.monotonic()
+
+    def __repr__(self):
+        return "AccelerometerStream at {} samples per second, +-{}g".format(self.data_rate, self.g_range)
+
+
+class TapDetector:
+    """
+    Find taps in windows of accelerometer samples. A tap is a sharp jolt, so the change between\
+    consecutive samples is used, which also takes gravity out. Every sample whose change goes\
+    over threshold is a candidate, and candidates closer than min_gap to the one before them\
+    belong to the same tap. Windows can be fed one after another, the detector carries the last\
+    sample and the last tap over.
+
+    :param data_rate : samples per second of the stream
+    :param threshold : change between two samples, in g, that counts as a jolt. Defaults to 0.5
+    :param min_gap : seconds that have to pass before a jolt counts as a new tap. Defaults to 0.08
+    """
+
+    def __init__(self, data_rate, threshold=0.5, min_gap=0.08):
+        self.data_rate = data_rate
+        self.threshold = threshold
+        self.min_gap = min_gap
+        self.__last_sample = None
+        self.__last_tap = -np.inf
+
+    def feed(self, samples, end_time):
+        """
+        Find the taps in the next window of samples
+
+        :param samples : array of [x, y, z] accelerations in g, oldest first, as AccelerometerStream.read returns
+        :param end_time : time.monotonic() time of the newest sample
+        :return : float array of the time.monotonic() times of the taps that start in this window
+        """
+
+        samples = np.asarray(samples, dtype=np.float64)
+        if len(samples) == 0:
+            return np.empty(0)
+        times = end_time - np.arange(len(samples) - 1, -1, -1) / self.data_rate
+
+        previous = samples[:1] if self.__last_sample is None else self.__last_sample[np.newaxis]
+        jolts = np.linalg.norm(np.diff(np.concatenate([previous, samples]), axis=0), axis=1)
+        self.__last_sample = samples[-1]
+
+        candidates = times[jolts > self.threshold]
+        if len(candidates) == 0:
+            return candidates
+        # A candidate starts a tap when it comes long enough after the candidate before it
+        before = np.concatenate([[self.__last_tap], candidates[:-1]])
+        taps = candidates[candidates - before >= self.min_gap]
+        self.__last_tap = candidates[-1]
+        return taps
+
+    def reset(self):
+        """
+        Forget the carried over sample and tap, e.g. after the stream was stopped
+        """
+
+        self.__last_sample = None
+        self.__last_tap = -np.inf
+
+    def __repr__(self):
+        return "TapDetector over {}g at {} samples per second".format(self.threshold, self.data_rate)
+
+
+def group_taps(times, max_interval=0.5):
+    """
+    Split tap times into multi taps: taps less than max_interval apart belong to the same one
+
+    :param times : array like of tap times, in order
+    :param max_interval : most seconds between two taps of one multi tap. Defaults to 0.5
+    :return : list of arrays of tap times, one per multi tap. The length of each is its tap count
+    """
+
+    times = np.asarray(times, dtype=np.float64)
+    if len(times) == 0:
+        return []
+    return np.split(times, np.flatnonzero(np.diff(times) > max_interval) + 1)
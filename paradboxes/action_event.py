@@ -4,6 +4,8 @@ Provide an event listener for connect devices
 Classes:
 
 ActionEvent()
+TapInterrupt(accelerometer, interrupt)
+TapStream(accelerometer, interrupt=None, interval=0.1)
 """
 
 from gpiozero import *
@@ -13,7 +15,135 @@ import busio
 import adafruit_lis3dh
 import adafruit_tcs34725
 import time
-import logging
+import asyncio
+import heapq
+import itertools
+import collections
+import selectors
+import socket
+import threading
+from paradboxes import log
+from paradboxes.tap_rhythm import TapRhythms
+
+logger = log.get_logger("action_event")
+
+
+def _tap_interrupt(accelerometer, interrupt):
+
+    # InitializeBoard hangs the INT1 pin on the accelerometer, so boards it set up never poll the bus
+    return interrupt if interrupt is not None else getattr(accelerometer, "tap_interrupt", None)
+
+
+class TapInterrupt:
+    """
+    Wait for accelerometer taps on the LIS3DH's INT1 line instead of polling the tapped flag.\
+    The accelerometer latches INT1 high when it sees the tap set with set_tap, and the rising\
+    edge wakes the waiting thread. The bus is only read once per edge, to confirm the tap and\
+    clear the latch so the line can rise for the next one. Nothing runs between taps.
+
+    :param accelerometer : adafruit_lis3dh accelerometer object, created without int1 so tapped reads the chip
+    :param interrupt : gpiozero DigitalInputDevice on the INT1 pin, e.g. InitializeBoard.tap_interrupt
+    """
+
+    def __init__(self, accelerometer, interrupt):
+        self.accelerometer = accelerometer
+        self.interrupt = interrupt
+        self.__taps = []
+        self.__tapped = threading.Condition()
+        # A tap latched before we started listening would hold the line high and hide every later edge.
+        # Listen first, so the edge of a tap that comes in while the latch is cleared is not missed
+        self.interrupt.when_activated = self.__on_edge
+        self.accelerometer.tapped
+
+    def __on_edge(self):
+
+        # Runs on gpiozero's callback thread
+        timestamp = time.monotonic()
+        if self.accelerometer.tapped:
+            with self.__tapped:
+                self.__taps.append(timestamp)
+                self.__tapped.notify_all()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the next tap
+
+        :param timeout : seconds to wait for at most. Defaults to None, which waits for as long as it takes
+        :return : time.monotonic() time of the tap, or None on timeout
+        """
+
+        with self.__tapped:
+            if not self.__tapped.wait_for(lambda: self.__taps, timeout):
+                return None
+            return self.__taps.pop(0)
+
+    def close(self):
+        """
+        Stop listening to the INT1 line
+        """
+
+        self.interrupt.when_activated = None
+
+    def __repr__(self):
+        return "TapInterrupt on {!r}".format(self.interrupt)
+
+
+class TapStream:
+    """
+    Asynchronous iterator of the time.monotonic() times of accelerometer taps, for use with\
+    async for on an asyncio event loop. With an interrupt the INT1 edge hands the tap to the\
+    loop, otherwise the accelerometer is polled every interval without blocking the loop.\
+    Create it from a coroutine running on the loop it is used on.
+
+    :param accelerometer : adafruit_lis3dh accelerometer object, with set_tap already called
+    :param interrupt : gpiozero DigitalInputDevice on the accelerometer's INT1 pin. Defaults to None, which is\
+    the accelerometer's tap_interrupt, or polling when it has none
+    :param interval : seconds between polls when there is no interrupt. Defaults to 0.1
+    """
+
+    def __init__(self, accelerometer, interrupt=None, interval=0.1):
+        self.accelerometer = accelerometer
+        self.interrupt = interrupt = _tap_interrupt(accelerometer, interrupt)
+        self.interval = interval
+        self.__loop = asyncio.get_running_loop()
+        self.__taps = asyncio.Queue()
+        if interrupt is not None:
+            # Listen, then clear a tap latched before now, which would keep the line from rising
+            interrupt.when_activated = self.__on_edge
+            accelerometer.tapped
+
+    def __on_edge(self):
+
+        # Runs on gpiozero's callback thread, the loop does the reading
+        self.__loop.call_soon_threadsafe(self.__check, time.monotonic())
+
+    def __check(self, timestamp):
+
+        if self.accelerometer.tapped:
+            self.__taps.put_nowait(timestamp)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+
+        if self.interrupt is None:
+            while self.__taps.empty():
+                self.__check(time.monotonic())
+                if self.__taps.empty():
+                    await asyncio.sleep(self.interval)
+        return await self.__taps.get()
+
+    def close(self):
+        """
+        Stop listening to the INT1 line
+        """
+
+        if self.interrupt is not None:
+            self.interrupt.when_activated = None
+
+    def __repr__(self):
+        return "TapStream of {!r}".format(self.accelerometer)
 
 
 class ActionEvents:
@@ -23,20 +153,57 @@ class ActionEvents:
     - Accelerometer
     - Motion Sensor
 
+    accelerometer_event and motion_event block until their one event. To wait on many inputs at\
+    once, register them with the add methods and call run: one thread then dispatches every tap,\
+    pin, threshold, timer and socket from a single loop. Interrupts and sockets wake the loop\
+    straight away, and inputs that have to be polled are read on deadlines kept in one heap, so\
+    nothing is read more often than its interval and every input is seen within it.
+
     Functions:
 
     accelerometer_event(self, accelerometer, callback, sensitivity=60, tap=True, double_tap=False,
-    multiple_tap=False, timeout=600)
+    multiple_tap=False, timeout=600, interrupt=None)
     motion_event(self, data_pin, callback)
+    add_tap(self, accelerometer, callback, sensitivity=60, double_tap=False, interrupt=None, interval=0.1)
+    add_rhythms(self, accelerometer, rhythms, sensitivity=60, interrupt=None, interval=0.02)
+    add_tap_stream(self, stream, callback, detector=None, multi_tap=False, max_interval=0.5, interval=None)
+    add_pin(self, pin, callback, active_value=1, interval=0.01)
+    add_threshold(self, read, callback, threshold, above=True, interval=0.1)
+    add_timer(self, seconds, callback, repeat=False)
+    add_socket(self, sock, callback)
+    call_soon(self, callback, value=None)
+    remove(self, handle)
+    run(self, timeout=None)
+    stop(self)
+    close(self), also called when used as a context manager
+
+    The same inputs can be awaited on an asyncio event loop instead:
+
+    await tap(self, accelerometer, sensitivity=60, double_tap=False, interrupt=None, timeout=None)
+    taps(self, accelerometer, sensitivity=60, double_tap=False, interrupt=None), used with async for
+    await motion(self, pin, active_value=1, interval=0.01, timeout=None)
     """
 
     def __init__(self):
-        logging.basicConfig(format="%(message)s %(asctime)s", datefmt=" ---[%m/%d/%y %I:%M:%S %p]", filename="log.log",
-                            level=logging.INFO)
-        logging.info("ActionEvent Object created")
+        log.configure()
+        logger.info("ActionEvent Object created")
+
+        self.__selector = selectors.DefaultSelector()
+        # Other threads write a byte here to wake the loop out of select
+        self.__wake_reader, self.__wake_writer = socket.socketpair()
+        self.__wake_reader.setblocking(False)
+        self.__wake_writer.setblocking(False)
+        self.__selector.register(self.__wake_reader, selectors.EVENT_READ)
+        self.__handles = itertools.count(1)
+        self.__deadlines = []
+        self.__posted = collections.deque()
+        self.__removers = {}
+        self.__lock = threading.Lock()
+        self.__running = False
+        self.__loop_thread = None
 
     def accelerometer_event(self, accelerometer, callback, sensitivity=60, tap=True, double_tap=False, tap_amount=None,
-                            multiple_tap=False, timeout=60, multiple_tap_interval=10):
+                            multiple_tap=False, timeout=60, multiple_tap_interval=10, interrupt=None):
         """
         Call back a given function when the specified action event happens on the accelerometer.\
         You can set multiple action events to be true, but not all the action events \
@@ -52,9 +219,13 @@ class ActionEvents:
         :param multiple_tap : records the sequence of taps in a 10 second time period. Action event
         :param timeout : the amount of time that it takes for the wait to timeout. Defaults to 600 seconds
         :param multiple_tap_interval : amount of time that the multitap function will go for. Defaults to 10 seconds
+        :param interrupt : gpiozero DigitalInputDevice on the accelerometer's INT1 pin, e.g.\
+        InitializeBoard.tap_interrupt. Taps then wake the wait within milliseconds instead of being polled\
+        for. Defaults to None, which is the accelerometer's tap_interrupt as InitializeBoard sets it, and polls\
+        the accelerometer when it has none
         """
 
-        logging.info("Accelerometer Event created")
+        logger.info("Accelerometer Event created")
         self.accelerometer = accelerometer
         self.accel_callback = callback
         self.timeout = timeout
@@ -64,86 +235,96 @@ class ActionEvents:
         # Get the type of action that you want to wait for
         if tap:
             self.accelerometer.set_tap(1, sensitivity)
-            self.__wait_for_tap()
+            wait = self.__wait_for_tap
         elif double_tap:
             self.accelerometer.set_tap(2, sensitivity)
-            self.__wait_for_tap()
+            wait = self.__wait_for_tap
         elif multiple_tap:
             self.accelerometer.set_tap(1, sensitivity)
-            self.__wait_for_multiple_tap()
+            wait = self.__wait_for_multiple_tap
         elif tap_amount is not None:
             self.accelerometer.set_tap(1, sensitivity)
-            self.__wait_for_tap_amount()
+            wait = self.__wait_for_tap_amount
         else:
             raise SyntaxError("No action event was set.")
 
-    def __wait_for_tap(self):
+        interrupt = _tap_interrupt(accelerometer, interrupt)
+        self.tap_interrupt = TapInterrupt(accelerometer, interrupt) if interrupt is not None else None
+        try:
+            wait()
+        finally:
+            if self.tap_interrupt is not None:
+                self.tap_interrupt.close()
+
+    def __next_tap(self, timeout):
 
-        tracker = 0
-        called = False
-        while tracker < self.timeout:
-            time_mark = time.time()
+        # Wait up to timeout seconds for a tap, and return its time.monotonic() time or None
+        if self.tap_interrupt is not None:
+            return self.tap_interrupt.wait(timeout)
 
-            # If the accelerometer is tapped then call the callback and break from the loop
+        deadline = time.monotonic() + timeout
+        while True:
             if self.accelerometer.tapped:
-                logging.info("Tap Detected")
-                self.__run_callback(self.accel_callback)
-                called = True
-                break
+                return time.monotonic()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(0.1, remaining))
+
+    def __wait_for_tap(self):
 
-            time.sleep(0.1)
-            tracker += time.time() - time_mark
+        # If the accelerometer is tapped then call the callback, otherwise call it once the wait times out
+        if self.__next_tap(self.timeout) is not None:
+            logger.info("Tap Detected")
+        else:
+            logger.info("Tap timed out.")
+        self.__run_callback(self.accel_callback)
 
-        logging.info("Tap timed out.")
+    def __tap_rhythms(self, capacity=32):
 
-        # Make sure that the callback is not called twice
-        if not called:
-            self.__run_callback(self.accel_callback)
+        # A polled tapped flag stays up for a while after a tap, an interrupt is cleared when it is read
+        debounce = 0.05 if self.tap_interrupt is not None else 0.2
+        return TapRhythms(capacity=capacity, debounce=debounce)
 
     def __wait_for_multiple_tap(self):
 
-        # Record touch time
-        time_intervals = []
-        # Record Overall_time
-        overall_time = 0
-        # Go through the loop until 10 seconds has passed
-        while overall_time < self.timeout:
-            beginning_time = time.time()
-            if self.accelerometer.tapped:
-                logging.info("Single Tap detected")
-                # Get current time stamp of when the accelerometer was pressed
-                time_intervals.append(time.time())
-                # Hope and pray that .2 s is fast enough to capture all the taps
-                # Without getting in the users way
-                time.sleep(0.2)
-            # Record the different between the current time and the starting time
-            # of the current loop
-            overall_time += time.time() - beginning_time
+        # Record touch time. Taps closer than the debounce to the one before are dropped without blocking
+        taps = self.__tap_rhythms(capacity=max(32, int(self.timeout / 0.05) + 1))
+        # Convert monotonic tap times into the time.time() times the callback gets
+        wall_offset = time.time() - time.monotonic()
+        deadline = time.monotonic() + self.timeout
+        # Go through the loop until the timeout has passed
+        while True:
+            tapped_at = self.__next_tap(deadline - time.monotonic())
+            if tapped_at is None:
+                break
+            if taps.tap(tapped_at):
+                logger.info("Single Tap detected")
 
         # Run the callback function after it's recorded all the taps within the time amount
-        self.__run_callback(self.accel_callback, value=time_intervals)
+        self.__run_callback(self.accel_callback, value=[tapped_at + wall_offset for tapped_at in taps.times()])
 
     def __wait_for_tap_amount(self):
 
-        # Record Overall_time
-        overall_time = 0
-        this_tap_count = 0
-        # Go through the loop until 10 seconds has passed
-        while overall_time <= self.timeout:
-            beginning_time = time.time()
-            if self.accelerometer.tapped:
-                logging.info("Single Tap detected")
-                # Hope and pray that .1 s is fast enough to capture all the taps
-                # Without getting in the users way
-                time.sleep(0.1)
-                this_tap_count += 1
-            # Record the different between the current time and the starting time
-            # of the current loop
-            overall_time += time.time() - beginning_time
-            if this_tap_count >= self.tap_amount:
+        if self.tap_amount <= 0:
+            # Nothing to wait for
+            self.__run_callback(self.accel_callback, value=0)
+            return
+
+        taps = self.__tap_rhythms(capacity=self.tap_amount + 1)
+        done = []
+        # tap_amount taps in any rhythm complete the wait
+        taps.add([0] * (self.tap_amount - 1), done.append, tolerance=float("inf"))
+        deadline = time.monotonic() + self.timeout
+        # Go through the loop until the timeout has passed or there were enough taps
+        while not done:
+            tapped_at = self.__next_tap(deadline - time.monotonic())
+            if tapped_at is None:
                 break
+            if taps.tap(tapped_at):
+                logger.info("Single Tap detected")
 
-        self.run_callback(self.accel_callback, value=this_tap_count)
+        self.__run_callback(self.accel_callback, value=len(taps))
 
     def motion_event(self, data_pin, callback):
         """
@@ -163,7 +344,7 @@ class ActionEvents:
         while flag:
             flag = self.__pin_equals_zero()
             time.sleep(0.01)
-        logging.info("Motion Detected")
+        logger.info("Motion Detected")
         self.__run_callback(self.motion_callback)
 
     def __pin_equals_zero(self):
@@ -176,6 +357,393 @@ class ActionEvents:
         else:
             return False
 
+    async def tap(self, accelerometer, sensitivity=60, double_tap=False, interrupt=None, timeout=None):
+        """
+        Wait on the event loop for a tap
+
+        :param accelerometer : adafruit_lis3dh accelerometer object
+        :param sensitivity : sensitivity of the accelerometer. Default is 60, can range from 0 - 100
+        :param double_tap : wait for a double tap instead of a single one. Defaults to False
+        :param interrupt : gpiozero DigitalInputDevice on the accelerometer's INT1 pin. Defaults to None, which\
+        is the accelerometer's tap_interrupt, or polling when it has none
+        :param timeout : seconds to wait for at most. Defaults to None. Raises asyncio.TimeoutError when it passes
+        :return : time.monotonic() time of the tap
+        """
+
+        taps = self.taps(accelerometer, sensitivity, double_tap, interrupt)
+        try:
+            return await asyncio.wait_for(taps.__anext__(), timeout)
+        finally:
+            taps.close()
+
+    def taps(self, accelerometer, sensitivity=60, double_tap=False, interrupt=None):
+        """
+        Get every tap on the event loop, with async for. Close the result when done with it
+
+        :param accelerometer : adafruit_lis3dh accelerometer object
+        :param sensitivity : sensitivity of the accelerometer. Default is 60, can range from 0 - 100
+        :param double_tap : get double taps instead of single ones. Defaults to False
+        :param interrupt : gpiozero DigitalInputDevice on the accelerometer's INT1 pin. Defaults to None, which\
+        is the accelerometer's tap_interrupt, or polling when it has none
+        :return : TapStream object
+        """
+
+        accelerometer.set_tap(2 if double_tap else 1, sensitivity)
+        return TapStream(accelerometer, interrupt)
+
+    async def motion(self, pin, active_value=1, interval=0.01, timeout=None):
+        """
+        Wait on the event loop until a pin is active, e.g. a motion sensor seeing motion
+
+        :param pin : gpiozero device, or any object with a value
+        :param active_value : value of the pin when active. Defaults to 1
+        :param interval : seconds between reads of the pin. Defaults to 0.01
+        :param timeout : seconds to wait for at most. Defaults to None. Raises asyncio.TimeoutError when it passes
+        """
+
+        async def wait_for_motion():
+            while pin.value != active_value:
+                await asyncio.sleep(interval)
+
+        await asyncio.wait_for(wait_for_motion(), timeout)
+        logger.info("Motion Detected")
+
+    def add_tap(self, accelerometer, callback, sensitivity=60, double_tap=False, interrupt=None, interval=0.1):
+        """
+        Call callback on every tap while run is going
+
+        :param accelerometer : adafruit_lis3dh accelerometer object
+        :param callback : callable function
+        :param sensitivity : sensitivity of the accelerometer. Default is 60, can range from 0 - 100
+        :param double_tap : wait for double taps instead of single ones. Defaults to False
+        :param interrupt : gpiozero DigitalInputDevice on the accelerometer's INT1 pin. Defaults to None, which\
+        is the accelerometer's tap_interrupt, or polling every interval when it has none
+        :param interval : seconds between polls when there is no interrupt. Defaults to 0.1
+        :return : handle for remove
+        """
+
+        return self.__add_tap(accelerometer, lambda timestamp: self.__run_callback(callback), sensitivity, double_tap,
+                              interrupt, interval)
+
+    def add_rhythms(self, accelerometer, rhythms, sensitivity=60, interrupt=None, interval=0.02):
+        """
+        Feed every tap into a TapRhythms, whose callbacks then run when their rhythm is tapped. Each tap\
+        goes in with the time of its INT1 edge, or of the poll that saw it, not the time the loop got to it
+
+        :param accelerometer : adafruit_lis3dh accelerometer object
+        :param rhythms : paradboxes.tap_rhythm.TapRhythms object with the rhythms added
+        :param sensitivity : sensitivity of the accelerometer. Default is 60, can range from 0 - 100
+        :param interrupt : gpiozero DigitalInputDevice on the accelerometer's INT1 pin. Defaults to None, which\
+        is the accelerometer's tap_interrupt, or polling every interval when it has none
+        :param interval : seconds between polls when there is no interrupt. A poll only knows a tap happened\
+        since the one before it, so this is how far off a polled tap time can be. Defaults to 0.02
+        :return : handle for remove
+        """
+
+        return self.__add_tap(accelerometer, lambda timestamp: self.__run_callback(rhythms.tap, value=timestamp),
+                              sensitivity, False, interrupt, interval)
+
+    def __add_tap(self, accelerometer, on_tap, sensitivity, double_tap, interrupt, interval):
+
+        # on_tap is called with the time.monotonic() time of each tap
+        accelerometer.set_tap(2 if double_tap else 1, sensitivity)
+
+        def check_tap(timestamp):
+            if accelerometer.tapped:
+                logger.info("Tap Detected")
+                on_tap(timestamp)
+
+        interrupt = _tap_interrupt(accelerometer, interrupt)
+        if interrupt is None:
+            return self.__add_poll(lambda: check_tap(time.monotonic()), interval)
+
+        handle = next(self.__handles)
+        # The edge is stamped on gpiozero's thread, before the loop gets to it
+        interrupt.when_activated = lambda: self.call_soon(check_tap, time.monotonic())
+        # Listening already, clear a tap latched before now, which would keep the line from rising
+        accelerometer.tapped
+        self.__removers[handle] = lambda: setattr(interrupt, "when_activated", None)
+        return handle
+
+    def add_tap_stream(self, stream, callback, detector=None, multi_tap=False, max_interval=0.5, interval=None):
+        """
+        Read an AccelerometerStream every interval and call callback for the taps its samples hold.\
+        Taps are found over each whole window of samples, so none are missed between reads
+
+        :param stream : started paradboxes.accelerometer_stream.AccelerometerStream object
+        :param callback : callable function, called with the time.monotonic() time of each tap, or with the\
+        tap count of each multi tap when multi_tap is on
+        :param detector : paradboxes.accelerometer_stream.TapDetector object. Defaults to None, which is one with\
+        its default threshold at the stream's data rate
+        :param multi_tap : group taps less than max_interval apart and call callback once per group. Defaults to False
+        :param max_interval : most seconds between two taps of one multi tap. Defaults to 0.5
+        :param interval : seconds between reads. Defaults to None, which is the stream's read_interval
+        :return : handle for remove
+        """
+
+        from paradboxes.accelerometer_stream import TapDetector, group_taps
+        if detector is None:
+            detector = TapDetector(stream.data_rate)
+        pending = []
+
+        def check_stream():
+            samples = stream.read()
+            now = time.monotonic()
+            taps = detector.feed(samples, now).tolist()
+            if not multi_tap:
+                for timestamp in taps:
+                    logger.info("Tap Detected")
+                    self.__run_callback(callback, value=timestamp)
+                return
+
+            pending.extend(taps)
+            groups = group_taps(pending, max_interval)
+            # The newest group can still grow until max_interval has passed since its last tap
+            if groups and now - groups[-1][-1] <= max_interval:
+                pending[:] = groups.pop().tolist()
+            else:
+                pending[:] = []
+            for group in groups:
+                logger.info("Multi tap of %d taps detected", len(group))
+                self.__run_callback(callback, value=len(group))
+
+        return self.__add_poll(check_stream, interval if interval is not None else stream.read_interval)
+
+    def add_pin(self, pin, callback, active_value=1, interval=0.01):
+        """
+        Call callback whenever a pin becomes active, e.g. a motion sensor seeing motion
+
+        :param pin : gpiozero device, or any object with a value
+        :param callback : callable function
+        :param active_value : value of the pin when active. Defaults to 1
+        :param interval : seconds between reads of the pin. Defaults to 0.01
+        :return : handle for remove
+        """
+
+        state = {"active": pin.value == active_value}
+
+        def check_pin():
+            active = pin.value == active_value
+            if active and not state["active"]:
+                logger.info("Pin %s activated", pin)
+                self.__run_callback(callback)
+            state["active"] = active
+
+        return self.__add_poll(check_pin, interval)
+
+    def add_threshold(self, read, callback, threshold, above=True, interval=0.1):
+        """
+        Call callback with the reading whenever a reading crosses a threshold, e.g. a color sensor's lux
+
+        :param read : function returning the current reading, e.g. lambda: color_sensor.lux
+        :param callback : callable function, called with the reading
+        :param threshold : value to cross
+        :param above : fire on going above threshold, or below it when False. Defaults to True
+        :param interval : seconds between readings. Defaults to 0.1
+        :return : handle for remove
+        """
+
+        def crossed(reading):
+            return reading > threshold if above else reading < threshold
+
+        state = {"crossed": crossed(read())}
+
+        def check_threshold():
+            reading = read()
+            if crossed(reading) and not state["crossed"]:
+                logger.info("Threshold %s crossed with %s", threshold, reading)
+                self.__run_callback(callback, value=reading)
+            state["crossed"] = crossed(reading)
+
+        return self.__add_poll(check_threshold, interval)
+
+    def add_timer(self, seconds, callback, repeat=False):
+        """
+        Call callback after some time
+
+        :param seconds : seconds from now
+        :param callback : callable function
+        :param repeat : call it every seconds instead of once. Defaults to False
+        :return : handle for remove
+        """
+
+        if repeat:
+            return self.__add_poll(lambda: self.__run_callback(callback), seconds, first=seconds)
+
+        handle = next(self.__handles)
+
+        def fire(deadline):
+            self.__removers.pop(handle, None)
+            self.__run_callback(callback)
+
+        # Registered before it is scheduled, a loop on another thread drops deadlines it has no remover for
+        self.__removers[handle] = lambda: None
+        self.__schedule(time.monotonic() + seconds, handle, fire)
+        return handle
+
+    def add_socket(self, sock, callback):
+        """
+        Call callback with the socket whenever it has data to read
+
+        :param sock : socket, or any object with fileno
+        :param callback : callable function, called with the socket
+        :return : handle for remove
+        """
+
+        handle = next(self.__handles)
+        self.__selector.register(sock, selectors.EVENT_READ, lambda: self.__run_callback(callback, value=sock))
+        self.__removers[handle] = lambda: self.__selector.unregister(sock)
+        self.__wake_from_other_thread()
+        return handle
+
+    def call_soon(self, callback, value=None):
+        """
+        Call callback from the run loop as soon as possible. Safe to call from any thread
+
+        :param callback : callable function
+        :param value : passed to the callback when not None. Defaults to None
+        """
+
+        self.__posted.append((callback, value))
+        self.__wake_from_other_thread()
+
+    def remove(self, handle):
+        """
+        Stop watching an input
+
+        :param handle : handle returned by one of the add methods
+        """
+
+        remover = self.__removers.pop(handle, None)
+        if remover is not None:
+            remover()
+
+    def run(self, timeout=None):
+        """
+        Dispatch events until stop is called or timeout has passed
+
+        :param timeout : seconds to run for at most. Defaults to None, which runs until stop
+        """
+
+        end = time.monotonic() + timeout if timeout is not None else None
+        self.__running = True
+        self.__loop_thread = threading.get_ident()
+        logger.info("Started the action event loop")
+
+        try:
+            while self.__running:
+                now = time.monotonic()
+                if end is not None and now >= end:
+                    break
+                self.__run_due(now)
+
+                with self.__lock:
+                    wait = self.__deadlines[0][0] - time.monotonic() if self.__deadlines else None
+                if end is not None:
+                    wait = end - time.monotonic() if wait is None else min(wait, end - time.monotonic())
+                if self.__posted:
+                    wait = 0
+
+                for key, _ in self.__selector.select(None if wait is None else max(0, wait)):
+                    if key.fileobj is self.__wake_reader:
+                        self.__drain_wake()
+                    else:
+                        key.data()
+
+                while self.__posted:
+                    callback, value = self.__posted.popleft()
+                    self.__run_callback(callback, value=value)
+        finally:
+            # A callback that raises ends the loop, which can then be run again
+            self.__running = False
+            self.__loop_thread = None
+            logger.info("Stopped the action event loop")
+
+    def stop(self):
+        """
+        Stop run after the event it is dispatching. Safe to call from any thread
+        """
+
+        self.__running = False
+        self.__wake_from_other_thread()
+
+    def close(self):
+        """
+        Stop watching every input and release the selector and the sockets used to wake the loop.\
+        Call it once run has returned
+        """
+
+        for handle in list(self.__removers):
+            self.remove(handle)
+        self.__selector.close()
+        self.__wake_reader.close()
+        self.__wake_writer.close()
+        logger.info("Closed the action event loop")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __add_poll(self, check, interval, first=0.0):
+
+        # Run check every interval seconds on the run loop, counting from fixed deadlines
+        handle = next(self.__handles)
+
+        def poll(deadline):
+            check()
+            if handle in self.__removers:
+                # A poll that fell behind moves on from now rather than running several times in a row
+                self.__schedule(max(deadline + interval, time.monotonic()), handle, poll)
+
+        self.__removers[handle] = lambda: None
+        self.__schedule(time.monotonic() + first, handle, poll)
+        return handle
+
+    def __schedule(self, deadline, handle, function):
+
+        with self.__lock:
+            earliest = not self.__deadlines or deadline < self.__deadlines[0][0]
+            heapq.heappush(self.__deadlines, (deadline, handle, function))
+        # The loop works its wait out from the head of the heap before every select, so it only has to be
+        # woken when the new deadline comes before the one it is already waiting for
+        if earliest:
+            self.__wake_from_other_thread()
+
+    def __run_due(self, now):
+
+        while True:
+            with self.__lock:
+                if not self.__deadlines or self.__deadlines[0][0] > now:
+                    return
+                deadline, handle, function = heapq.heappop(self.__deadlines)
+            # Removed inputs are dropped when their deadline comes up
+            if handle in self.__removers:
+                function(deadline)
+
+    def __wake_from_other_thread(self):
+
+        # The loop thread picks up its own changes on its next pass without a wake up
+        if threading.get_ident() != self.__loop_thread:
+            self.__wake()
+
+    def __wake(self):
+
+        try:
+            self.__wake_writer.send(b"\0")
+        except BlockingIOError:
+            # The loop already has a wake up waiting
+            pass
+
+    def __drain_wake(self):
+
+        try:
+            while self.__wake_reader.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
     def __run_callback(self, callback, value=None):
         """
         Call the callback function. If value does not equal None then pass the values\
@@ -185,7 +753,7 @@ class ActionEvents:
         :param value : extra parameters needing to be passed to the callback function. Default is None
         """
 
-        logging.info("Callback, {}, run for action event".format(callback))
+        logger.info("Callback, %s, run for action event", callback)
 
         # Check if value was passed
         if value is None:
@@ -0,0 +1,168 @@
+"""
+Convert whole arrays of colors between rgb, HSV, HSL and driver values in one call, and build\
+palettes, gradients and rainbows from them. Works on NumPy arrays whose last axis holds the three\
+components, so a 10000 color rainbow is a handful of array operations instead of a Python loop.
+
+rgb values are 0-255. Hue is in degrees (0-360), saturation, value and lightness are 0-1.
+
+Functions:
+
+rgb_to_hsv(rgb)
+hsv_to_rgb(hsv)
+rgb_to_hsl(rgb)
+hsl_to_rgb(hsl)
+rgb_to_driver(rgb, color_table=None)
+gradient(colors, steps, space="rgb")
+rainbow(steps, saturation=1.0, value=1.0, start_hue=0.0)
+to_sequence(rgb)
+"""
+
+import numpy as np
+from paradboxes.playback import DEFAULT_COLOR_TABLE
+
+
+def _hue_and_range(rgb):
+
+    rgb = np.asarray(rgb, dtype=np.float64) / 255
+    red, green, blue = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    maximum = rgb.max(axis=-1)
+    minimum = rgb.min(axis=-1)
+    delta = maximum - minimum
+    safe_delta = np.where(delta == 0, 1, delta)
+
+    hue = np.where(maximum == red, ((green - blue) / safe_delta) % 6,
+                   np.where(maximum == green, (blue - red) / safe_delta + 2, (red - green) / safe_delta + 4))
+    hue = np.where(delta == 0, 0, hue * 60)
+    return hue, maximum, minimum, delta
+
+
+def rgb_to_hsv(rgb):
+    """
+    Convert rgb colors to HSV
+
+    :param rgb : array like of rgb values, shape (..., 3)
+    :return : array of [hue, saturation, value], same shape
+    """
+
+    hue, maximum, _, delta = _hue_and_range(rgb)
+    saturation = np.where(maximum == 0, 0, delta / np.where(maximum == 0, 1, maximum))
+    return np.stack([hue, saturation, maximum], axis=-1)
+
+
+def hsv_to_rgb(hsv):
+    """
+    Convert HSV colors to rgb
+
+    :param hsv : array like of [hue, saturation, value], shape (..., 3)
+    :return : array of rgb values (floats), same shape
+    """
+
+    hsv = np.asarray(hsv, dtype=np.float64)
+    hue, saturation, value = hsv[..., 0:1], hsv[..., 1:2], hsv[..., 2:3]
+    k = (np.array([5, 3, 1]) + hue / 60) % 6
+    return 255 * (value - value * saturation * np.clip(np.minimum(k, 4 - k), 0, 1))
+
+
+def rgb_to_hsl(rgb):
+    """
+    Convert rgb colors to HSL
+
+    :param rgb : array like of rgb values, shape (..., 3)
+    :return : array of [hue, saturation, lightness], same shape
+    """
+
+    hue, maximum, minimum, delta = _hue_and_range(rgb)
+    lightness = (maximum + minimum) / 2
+    divisor = 1 - np.abs(2 * lightness - 1)
+    saturation = np.where(delta == 0, 0, delta / np.where(divisor == 0, 1, divisor))
+    return np.stack([hue, saturation, lightness], axis=-1)
+
+
+def hsl_to_rgb(hsl):
+    """
+    Convert HSL colors to rgb
+
+    :param hsl : array like of [hue, saturation, lightness], shape (..., 3)
+    :return : array of rgb values (floats), same shape
+    """
+
+    hsl = np.asarray(hsl, dtype=np.float64)
+    hue, saturation, lightness = hsl[..., 0:1], hsl[..., 1:2], hsl[..., 2:3]
+    k = (np.array([0, 8, 4]) + hue / 30) % 12
+    a = saturation * np.minimum(lightness, 1 - lightness)
+    return 255 * (lightness - a * np.clip(np.minimum(k - 3, 9 - k), -1, 1))
+
+
+def rgb_to_driver(rgb, color_table=None):
+    """
+    Convert rgb colors (0-255) to driver values (0-4095) through a ColorTable of any depth
+
+    :param rgb : array like of rgb values, shape (..., 3)
+    :param color_table : ColorTable used for the conversion. Defaults to DEFAULT_COLOR_TABLE
+    :return : uint16 array of driver values, same shape
+    """
+
+    table = color_table if color_table is not None else DEFAULT_COLOR_TABLE
+    lookup = np.array([table.red, table.green, table.blue], dtype=np.uint16)
+    top = lookup.shape[1] - 1
+    # rgb is 0-255 whatever the depth of the table, a deeper table takes more levels per rgb step
+    indexes = np.clip(np.rint(np.asarray(rgb, dtype=np.float64) * (top / 255)), 0, top).astype(np.intp)
+    return lookup[np.arange(3), indexes]
+
+
+def gradient(colors, steps, space="rgb"):
+    """
+    Spread colors evenly over a number of steps and interpolate between them
+
+    :param colors : list of rgb values, the stops of the gradient
+    :param steps : amount of colors to return
+    :param space : "rgb", "hsv" or "hsl", the space to interpolate in. Hues take the short way round
+    :return : array of rgb values (floats), shape (steps, 3)
+    """
+
+    stops = np.asarray(colors, dtype=np.float64).reshape(-1, 3)
+    if space == "hsv":
+        stops = rgb_to_hsv(stops)
+    elif space == "hsl":
+        stops = rgb_to_hsl(stops)
+    elif space != "rgb":
+        raise ValueError("space must be \"rgb\", \"hsv\" or \"hsl\", not \"{}\"".format(space))
+    if space != "rgb":
+        stops[:, 0] = np.rad2deg(np.unwrap(np.deg2rad(stops[:, 0])))
+
+    stop_positions = np.linspace(0, 1, len(stops))
+    positions = np.linspace(0, 1, steps)
+    result = np.stack([np.interp(positions, stop_positions, stops[:, component]) for component in range(3)],
+                      axis=-1)
+
+    if space == "hsv":
+        return hsv_to_rgb(result)
+    if space == "hsl":
+        return hsl_to_rgb(result)
+    return result
+
+
+def rainbow(steps, saturation=1.0, value=1.0, start_hue=0.0):
+    """
+    Go once round the color wheel
+
+    :param steps : amount of colors to return
+    :param saturation : saturation of every color. Defaults to 1.0
+    :param value : value of every color. Defaults to 1.0
+    :param start_hue : hue of the first color, in degrees. Defaults to 0.0
+    :return : array of rgb values (floats), shape (steps, 3)
+    """
+
+    hues = start_hue + np.arange(steps) * (360.0 / steps)
+    hsv = np.stack([hues, np.full(steps, saturation), np.full(steps, value)], axis=-1)
+    return hsv_to_rgb(hsv)
+
+
+def to_sequence(rgb):
+    """
+    Round an array of rgb values into the list of lists Blink(sequence=...) takes
+
+    :param rgb : array like of rgb values, shape (n, 3)
+    """
+
+    return np.clip(np.rint(np.asarray(rgb, dtype=np.float64)), 0, 255).astype(int).tolist()
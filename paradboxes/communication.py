@@ -8,8 +8,10 @@ WifiComunication()
 """
 
 import bluetooth as bl
-import logging
 import time
+from paradboxes import log
+
+logger = log.get_logger("communication")
 
 class WifiCommunication:
     """
@@ -62,9 +64,9 @@ class Bluetooth:
 
             self.socket = bl.BluetoothSocket()
             self.socket.connect((host, port))
-            logging.info("Connected to {} on port {}".format(name, port))
+            logger.info("Connected to %s on port %s", name, port)
         else:
-            logging.info("Could not connect to the device")
+            logger.info("Could not connect to the device")
             self.connect_to_device(uuid)
 
 
@@ -128,7 +130,7 @@ class Bluetooth:
         self.server.listen(1)
         bl.advertise_service(self.server, name, uuid)
         self.client_sock, address = self.server.accept()
-        logging.info("Device Connected with address {}".format(address))
+        logger.info("Device Connected with address %s", address)
 
 
     def wait_for_message(self, callback):
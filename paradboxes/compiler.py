@@ -0,0 +1,235 @@
+"""
+Compile Blink animations into NumPy arrays of driver values, so they can be replayed without\
+working out colors, conversions and log lines on every frame. A Blink is compiled by running\
+it once against a recording stand in for the LED Driver on a virtual clock, which means every\
+mode compiles exactly the way it would play.
+
+Functions:
+
+compile_blink(blink, use_cache=True)
+
+Classes:
+
+CompiledEffect(values, timestamps, channels, duration)
+"""
+
+import copy
+import time
+from collections import OrderedDict
+import numpy as np
+from paradboxes.pca9685 import FrameMixin
+
+
+class _VirtualTime:
+    """
+    Clock that only moves when slept on, so compiling takes no real time.
+    """
+
+    def __init__(self):
+        self.time = 0.0
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.time += seconds
+
+
+class _FrameRecorder(FrameMixin):
+    """
+    Stand in for PWM that records the state of the given channels after every write.
+    """
+
+    def __init__(self, channels, clock):
+        self.channels = channels
+        self.clock = clock
+        self.state = {channel: 4095 for channel in channels}
+        self.timestamps = []
+        self.frames = []
+
+    def __record(self, values):
+
+        self.state.update(values)
+        frame = [self.state[channel] for channel in self.channels]
+        # A frame that repeats the one before it changes nothing, the earlier one is held instead
+        if self.frames and self.frames[-1] == frame:
+            return
+        # Only the last write of an instant is ever seen
+        if self.timestamps and self.timestamps[-1] == self.clock.now():
+            self.frames[-1] = frame
+        else:
+            self.timestamps.append(self.clock.now())
+            self.frames.append(frame)
+
+    def write(self, channel, on, off):
+        self.__record({channel: off})
+
+    def write_channels(self, start, values):
+        self.__record({start + index: off for index, (on, off) in enumerate(values)})
+
+    def write_all_value(self, on, off):
+        self.__record({channel: off for channel in self.channels})
+
+    def _commit_frame(self, frame):
+        self.__record({channel: off for channel, (on, off) in frame.items()})
+
+
+class CompiledEffect:
+    """
+    A Blink animation as a dense array of driver values with the time each row is shown.\
+    Reusable: play it as often as needed, on any PWM like object, or save it to disk.
+
+    :param values : array of driver values (0-4095), one row per frame and one column per channel
+    :param timestamps : array of the seconds from the start at which each frame is shown
+    :param channels : list of the channels the columns belong to
+    :param duration : seconds the animation lasts, including the wait after the last frame
+    """
+
+    def __init__(self, values, timestamps, channels, duration):
+        self.values = np.asarray(values, dtype=np.uint16).reshape(-1, len(channels))
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.channels = list(channels)
+        self.duration = float(duration)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def frame_at(self, seconds):
+        """
+        Get the driver values showing at a point in the animation
+
+        :param seconds : time from the start of the animation
+        :return : array of driver values, or None before the first frame
+        """
+
+        index = int(np.searchsorted(self.timestamps, seconds, side="right")) - 1
+        if index < 0:
+            return None
+        return self.values[index]
+
+    def resample(self, frame_rate):
+        """
+        Get the animation as evenly spaced frames, e.g. to write it as a show file
+
+        :param frame_rate : frames per second
+        :return : array of driver values, one row per frame
+        """
+
+        times = np.arange(int(round(self.duration * frame_rate))) / frame_rate
+        indexes = np.searchsorted(self.timestamps, times, side="right") - 1
+        # Before the first frame the strip is still dark
+        dark = np.full((1, len(self.channels)), 4095, dtype=np.uint16)
+        return np.concatenate([dark, self.values])[indexes + 1]
+
+    def play(self, pwm, sleep=time.sleep, clock=time.monotonic):
+        """
+        Play the animation. The loop only waits for each frame's deadline and writes it. A frame\
+        whose successor is already due is skipped, so a slow bus does not stretch the animation
+
+        :param pwm : PWM object, or anything with the same frame methods
+        :param sleep : function used to wait. Defaults to time.sleep
+        :param clock : function returning the current time in seconds. Defaults to time.monotonic
+        """
+
+        channels = self.channels
+        timestamps = self.timestamps.tolist()
+        # The last frame is always shown, it is what the strip is left at
+        next_timestamps = timestamps[1:] + [float("inf")]
+        start = clock()
+        for timestamp, next_timestamp, frame in zip(timestamps, next_timestamps, self.values.tolist()):
+            now = clock()
+            if start + next_timestamp <= now:
+                continue
+            remaining = start + timestamp - now
+            if remaining > 0:
+                sleep(remaining)
+            pwm.begin_frame()
+            for channel, value in zip(channels, frame):
+                pwm.set(channel, value)
+            pwm.commit()
+
+        remaining = start + self.duration - clock()
+        if remaining > 0:
+            sleep(remaining)
+
+    def save(self, path):
+        """
+        Save the animation to a .npz file
+
+        :param path : file path
+        """
+
+        np.savez(path, values=self.values, timestamps=self.timestamps, channels=np.asarray(self.channels),
+                 duration=np.asarray(self.duration))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an animation saved with save
+
+        :param path : file path
+        """
+
+        with np.load(path) as data:
+            return cls(data["values"], data["timestamps"], data["channels"].tolist(), float(data["duration"]))
+
+    def __repr__(self):
+        return "CompiledEffect of {} frames over {:.2f}s on channels {}".format(len(self), self.duration,
+                                                                                 self.channels)
+
+
+# Most recently used compiles, oldest first
+_compiled = OrderedDict()
+_CACHE_SIZE = 32
+
+
+def _blink_key(blink):
+
+    def freeze(value):
+        if isinstance(value, (list, tuple)):
+            return tuple(freeze(item) for item in value)
+        return value
+
+    # Keyed on what the color table contains, not on the object, so an equal table hits the cache
+    # and a new table can never be taken for an old one that happened to get the same id
+    table = blink.color_table
+    return (freeze(blink.channels), freeze(blink.rgb), blink.interval, blink.timeout, freeze(blink.sequence),
+            freeze(blink.interval_sequence), blink.random_sequence, blink.soft, blink.random, blink.chaos,
+            freeze(blink.random_rgb_start), tuple(table.red), tuple(table.green), tuple(table.blue),
+            blink.frame_rate, blink.fade_duration, blink.seed)
+
+
+def compile_blink(blink, use_cache=True):
+    """
+    Compile a configured Blink into a CompiledEffect. The Blink itself is left untouched.\
+    Random modes are compiled once, so every replay of the result shows the same colors. Give\
+    the Blink a seed to get the same colors from every compile as well.
+
+    :param blink : Blink object
+    :param use_cache : reuse the result of an earlier compile of an identically configured Blink. The last\
+    _CACHE_SIZE compiles are kept. A Blink with its own rng is never cached, its values depend on the rng's state.\
+    Defaults to True
+    :return : CompiledEffect object
+    """
+
+    use_cache = use_cache and blink.rng is None
+    key = _blink_key(blink) if use_cache else None
+    if use_cache and key in _compiled:
+        _compiled.move_to_end(key)
+        return _compiled[key]
+
+    virtual_time = _VirtualTime()
+    recorder = _FrameRecorder(blink.channels, virtual_time)
+    effect = copy.copy(blink)
+    effect.pwm = recorder
+    effect._sleep = virtual_time.sleep
+    effect._now = virtual_time.now
+    effect.start()
+
+    compiled = CompiledEffect(recorder.frames, recorder.timestamps, blink.channels, virtual_time.now())
+    if use_cache:
+        _compiled[key] = compiled
+        if len(_compiled) > _CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return compiled
@@ -0,0 +1,146 @@
+"""
+Run several LED strip animations at once on one PCA9685 LED Driver. A driver has 16 channels,\
+enough for five RGB strips, and the compositor plays an animation on each strip from a single\
+loop, sending everything that changed in a tick as one frame.
+
+Classes:
+
+Compositor(pwm, frame_rate=50)
+"""
+
+import threading
+import time
+from paradboxes import log
+from paradboxes.compiler import CompiledEffect, compile_blink
+from paradboxes.show_file import ShowFile
+from paradboxes.playback import FramePacer
+from paradboxes.strip_control import Blink
+
+logger = log.get_logger("compositor")
+
+
+class _Layer:
+    """
+    One animation placed on a set of channels.
+    """
+
+    def __init__(self, source, channels, loop, start):
+        self.source = source
+        self.channels = channels
+        self.loop = loop
+        self.start = start
+        if isinstance(source, ShowFile):
+            self.duration = len(source) / source.frame_rate
+        else:
+            self.duration = source.duration
+
+    def finished(self, seconds):
+        return not self.loop and seconds >= self.start + self.duration
+
+    def frame_at(self, seconds):
+
+        seconds -= self.start
+        if seconds < 0 or (not self.loop and seconds >= self.duration):
+            return None
+        if self.loop and self.duration > 0:
+            seconds %= self.duration
+        if isinstance(self.source, ShowFile):
+            return self.source.frame(min(int(seconds * self.source.frame_rate), len(self.source) - 1))
+        return self.source.frame_at(seconds)
+
+
+class Compositor:
+    """
+    Play many animations side by side, each on its own channels, from one scheduling loop.\
+    Each tick every animation is sampled at the same moment and the result is committed\
+    as one frame, so the strips never fight over the bus.
+
+    :param pwm : PWM object, or anything with the same frame methods
+    :param frame_rate : ticks per second. Defaults to 50
+    """
+
+    def __init__(self, pwm, frame_rate=50):
+        self.pwm = pwm
+        self.frame_rate = frame_rate
+        self.layers = []
+        self.__stop = threading.Event()
+
+    def add(self, effect, channels=None, loop=False, start=0.0):
+        """
+        Add an animation. Blink objects are compiled first
+
+        :param effect : Blink, CompiledEffect or ShowFile object
+        :param channels : channels to play it on, in the order of the animation's channels. Defaults to None,\
+        which keeps the animation's own channels
+        :param loop : start the animation over when it ends. Defaults to False
+        :param start : seconds into the run at which the animation starts. Defaults to 0.0
+        :return : the added layer, which can be passed to remove
+        """
+
+        if isinstance(effect, Blink):
+            effect = compile_blink(effect)
+        if not isinstance(effect, (CompiledEffect, ShowFile)):
+            raise TypeError("Can not composite {!r}".format(effect))
+        channels = list(channels) if channels is not None else list(effect.channels)
+        if len(channels) != len(effect.channels):
+            raise ValueError("The animation has {} channels, got {}".format(len(effect.channels), len(channels)))
+
+        taken = {channel for layer in self.layers for channel in layer.channels}
+        if taken & set(channels):
+            raise ValueError("Channels {} are already used by another animation".format(sorted(taken & set(channels))))
+
+        layer = _Layer(effect, channels, loop, start)
+        self.layers.append(layer)
+        logger.info("Added animation on channels %s to the compositor", channels)
+        return layer
+
+    def remove(self, layer):
+        """
+        Take an animation out
+
+        :param layer : layer returned by add
+        """
+
+        self.layers.remove(layer)
+
+    def run(self, duration=None, sleep=None, clock=time.monotonic):
+        """
+        Play every animation until they have all ended, duration has passed or stop is called
+
+        :param duration : seconds to run for at most. Defaults to None, which runs until the animations end.\
+        Looping animations never end, so give a duration or call stop
+        :param sleep : function used to wait. Defaults to None, which waits in a way stop can interrupt
+        :param clock : function returning the current time in seconds. Defaults to time.monotonic
+        """
+
+        self.__stop.clear()
+        pacer = FramePacer(self.frame_rate, sleep=sleep or self.__stop.wait, clock=clock)
+        logger.info("Started compositing %d animations", len(self.layers))
+
+        while not self.__stop.is_set():
+            # Ticks skip the frames the bus fell behind on, so the frame count stays on the clock
+            seconds = pacer.frame / self.frame_rate
+            if duration is not None and seconds >= duration:
+                break
+            if all(layer.finished(seconds) for layer in self.layers):
+                break
+
+            self.pwm.begin_frame()
+            for layer in self.layers:
+                values = layer.frame_at(seconds)
+                if values is not None:
+                    for channel, value in zip(layer.channels, values):
+                        self.pwm.set(channel, int(value))
+            self.pwm.commit()
+            pacer.tick()
+        logger.info("Stopped compositing, %d frames skipped, jitter %.2fms", pacer.skipped, pacer.jitter * 1000)
+
+    def stop(self):
+        """
+        Stop run at its next tick. Safe to call from any thread
+        """
+
+        self.__stop.set()
+
+    def __repr__(self):
+        return "Compositor of {} animations at {} fps".format(len(self.layers), self.frame_rate)
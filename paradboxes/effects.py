@@ -0,0 +1,479 @@
+"""
+Build LED strip animations out of frame generators. A source yields one rgb frame per tick,\
+stages wrap a frame iterable and change it on the way through, and play sends the result to\
+the LED Driver from one paced loop. Everything is lazy: a frame is only worked out when it is\
+about to be shown, so stages can be chained freely without building lists.
+
+Frames are (red, green, blue) tuples of 0-255 values, which may be floats.
+
+Example:
+
+frames = Pipeline(soft_sequence([[255, 0, 0], [0, 0, 255]], 2.0)).brightness(0.5).gamma(2.2)
+frames.play(pwm)
+
+Functions:
+
+solid(rgb, seconds, frame_rate=50)
+on_off(rgb, interval, cycles=1, off_rgb=(0, 0, 0), frame_rate=50)
+sequence(colors, interval, cycles=1, frame_rate=50)
+fade(start_rgb, end_rgb, seconds, frame_rate=50)
+soft_sequence(colors, seconds, cycles=1, frame_rate=50)
+random_colors(interval, cycles=1, soft=False, start_rgb=None, frame_rate=50, rng=random)
+chaos(cycles=1, frame_rate=50, rng=random)
+from_blink(blink, frame_rate=None)
+brightness(frames, level)
+gamma(frames, exponent)
+crossfade(outgoing, incoming, frame_count)
+time_stretch(frames, factor)
+mask(frames, channel_mask)
+channel_swap(frames, order)
+play(frames, pwm, channels=(12, 8, 4), frame_rate=50, color_table=None, dither=True, sleep=time.sleep,
+     clock=time.monotonic, pacer=None)
+await play_async(frames, pwm, channels=(12, 8, 4), frame_rate=50, color_table=None, dither=True,
+                 sleep=asyncio.sleep, clock=time.monotonic, pacer=None)
+
+Classes:
+
+Pipeline(frames)
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from paradboxes.playback import DEFAULT_COLOR_TABLE, FramePacer, RandomStream, TemporalDither
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+
+def _frame_count(seconds, frame_rate):
+    return max(1, int(round(seconds * frame_rate)))
+
+
+def _random_rgb(rng):
+    if isinstance(rng, RandomStream):
+        return tuple(rng.rgb())
+    return (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+
+
+# Sources
+
+def solid(rgb, seconds, frame_rate=50):
+    """
+    Show one color
+
+    :param rgb : rgb value
+    :param seconds : how long to show it for
+    :param frame_rate : frames per second. Defaults to 50
+    """
+
+    return itertools.repeat(tuple(rgb), _frame_count(seconds, frame_rate))
+
+
+def on_off(rgb, interval, cycles=1, off_rgb=BLACK, frame_rate=50):
+    """
+    Switch between a color and off, each shown for interval seconds
+
+    :param rgb : rgb value
+    :param interval : seconds each half of a cycle lasts
+    :param cycles : amount of on/off cycles. Defaults to 1
+    :param off_rgb : rgb value of the off half. Defaults to black
+    :param frame_rate : frames per second. Defaults to 50
+    """
+
+    for _ in range(cycles):
+        yield from solid(rgb, interval, frame_rate)
+        yield from solid(off_rgb, interval, frame_rate)
+
+
+def sequence(colors, interval, cycles=1, frame_rate=50):
+    """
+    Show each color of a list in turn
+
+    :param colors : list of rgb values
+    :param interval : seconds each color is shown for
+    :param cycles : times to go through the list. Defaults to 1
+    :param frame_rate : frames per second. Defaults to 50
+    """
+
+    for _ in range(cycles):
+        for rgb in colors:
+            yield from solid(rgb, interval, frame_rate)
+
+
+def fade(start_rgb, end_rgb, seconds, frame_rate=50):
+    """
+    Fade from one color to another with all channels changing together
+
+    :param start_rgb : rgb value to start from
+    :param end_rgb : rgb value to end on
+    :param seconds : how long the fade takes
+    :param frame_rate : frames per second. Defaults to 50
+    """
+
+    frames = _frame_count(seconds, frame_rate)
+    red, green, blue = start_rgb
+    red_step = (end_rgb[0] - red) / frames
+    green_step = (end_rgb[1] - green) / frames
+    blue_step = (end_rgb[2] - blue) / frames
+    for frame in range(1, frames):
+        yield (red + red_step * frame, green + green_step * frame, blue + blue_step * frame)
+    # The last frame lands exactly on the target, without rounding error from the steps
+    yield tuple(end_rgb)
+
+
+def soft_sequence(colors, seconds, cycles=1, frame_rate=50):
+    """
+    Fade from each color of a list to the next, and from the last back to the first
+
+    :param colors : list of rgb values
+    :param seconds : how long each fade takes
+    :param cycles : times to go through the list. Defaults to 1
+    :param frame_rate : frames per second. Defaults to 50
+    """
+
+    for _ in range(cycles):
+        for index, rgb in enumerate(colors):
+            yield from fade(rgb, colors[(index + 1) % len(colors)], seconds, frame_rate)
+
+
+def random_colors(interval, cycles=1, soft=False, start_rgb=None, frame_rate=50, rng=random):
+    """
+    Go through random colors, either switching or fading between them
+
+    :param interval : seconds each color is shown for, or each fade takes when soft
+    :param cycles : amount of colors. Defaults to 1
+    :param soft : fade between the colors. Defaults to False
+    :param start_rgb : color the first fade starts from. Defaults to None, a random color
+    :param frame_rate : frames per second. Defaults to 50
+    :param rng : random number generator with randint, e.g. a RandomStream. Defaults to the random module
+    """
+
+    current = tuple(start_rgb) if start_rgb is not None else _random_rgb(rng)
+    for _ in range(cycles):
+        next_rgb = _random_rgb(rng)
+        if soft:
+            yield from fade(current, next_rgb, interval, frame_rate)
+        else:
+            yield from solid(next_rgb, interval, frame_rate)
+        current = next_rgb
+
+
+def chaos(cycles=1, frame_rate=50, rng=random):
+    """
+    Random colors shown for random times of up to a second
+
+    :param cycles : amount of colors. Defaults to 1
+    :param frame_rate : frames per second. Defaults to 50
+    :param rng : random number generator with randint, e.g. a RandomStream. Defaults to the random module
+    """
+
+    for _ in range(cycles):
+        interval = rng.randint(0, 100) / 100
+        rgb = _random_rgb(rng)
+        yield from solid(rgb, interval, frame_rate)
+
+
+def _blink_random_sequence(blink, rng, cycles, fade_seconds, frame_rate):
+
+    colors = blink.sequence
+    if blink.soft:
+        current = rng.choice(colors)
+        for _ in range(cycles):
+            next_rgb = rng.choice(colors)
+            yield from fade(current, next_rgb, fade_seconds, frame_rate)
+            current = next_rgb
+    else:
+        for _ in range(cycles):
+            yield from solid(rng.choice(colors), blink.interval, frame_rate)
+
+
+def _blink_random(blink, rng, cycles, frame_rate):
+
+    intervals = iter(blink.interval_sequence) if blink.interval_sequence is not None else None
+    interval = blink.interval
+    for _ in range(cycles):
+        if intervals is not None:
+            interval = next(intervals)
+        yield from solid(_random_rgb(rng), 0.1, frame_rate)
+        yield from solid(WHITE, interval, frame_rate)
+
+
+def from_blink(blink, frame_rate=None):
+    """
+    Get the frames of a configured Blink. These are the frames Blink.start plays, so every mode\
+    is defined once, here. Random values come from the Blink's seed or rng, so a seeded Blink gives\
+    the same frames every time it plays
+
+    :param blink : Blink object
+    :param frame_rate : frames per second to build the frames at. Defaults to None, the Blink's frame_rate
+    """
+
+    cycles = blink.timeout + 1
+    frame_rate = frame_rate if frame_rate is not None else blink.frame_rate
+    fade_seconds = blink.fade_duration if blink.fade_duration is not None else blink.interval * 255
+    rng = blink.random_values()
+
+    if blink.sequence is not None:
+        if blink.random_sequence:
+            return _blink_random_sequence(blink, rng, cycles, fade_seconds, frame_rate)
+        if blink.soft:
+            return soft_sequence(blink.sequence, fade_seconds, cycles, frame_rate)
+        return sequence(blink.sequence, blink.interval, cycles, frame_rate)
+    if blink.random and blink.soft:
+        return random_colors(fade_seconds, cycles, soft=True, start_rgb=blink.random_rgb_start, frame_rate=frame_rate,
+                             rng=rng)
+    if blink.random:
+        return _blink_random(blink, rng, cycles, frame_rate)
+    if blink.chaos:
+        return chaos(cycles, frame_rate, rng)
+    return on_off(blink.rgb, blink.interval, cycles, frame_rate=frame_rate)
+
+
+# Stages
+
+def brightness(frames, level):
+    """
+    Scale every frame
+
+    :param frames : frame iterable
+    :param level : scale factor (0-1), or an iterable giving one factor per frame
+    """
+
+    levels = itertools.repeat(level) if isinstance(level, (int, float)) else level
+    for (red, green, blue), scale in zip(frames, levels):
+        yield (red * scale, green * scale, blue * scale)
+
+
+def gamma(frames, exponent):
+    """
+    Apply a gamma curve to every frame
+
+    :param frames : frame iterable
+    :param exponent : gamma exponent, e.g. 2.2
+    """
+
+    for red, green, blue in frames:
+        yield (255 * (max(0, red) / 255) ** exponent, 255 * (max(0, green) / 255) ** exponent,
+               255 * (max(0, blue) / 255) ** exponent)
+
+
+def crossfade(outgoing, incoming, frame_count):
+    """
+    Blend from one animation into another over frame_count frames, then carry on with the\
+    incoming one. Both run during the blend
+
+    :param outgoing : frame iterable that is faded out
+    :param incoming : frame iterable that is faded in
+    :param frame_count : frames the blend takes
+    """
+
+    incoming = iter(incoming)
+    for index, (old, new) in enumerate(zip(outgoing, incoming)):
+        if index >= frame_count:
+            yield new
+            break
+        weight = (index + 1) / frame_count
+        yield tuple(old_value + (new_value - old_value) * weight for old_value, new_value in zip(old, new))
+    yield from incoming
+
+
+def time_stretch(frames, factor):
+    """
+    Play frames slower (factor above 1) or faster (factor below 1) by holding or skipping frames
+
+    :param frames : frame iterable
+    :param factor : how many times longer the animation should take
+    """
+
+    position = 0.0
+    for source_index, source_frame in enumerate(frames):
+        while int(position) == source_index:
+            yield source_frame
+            position += 1 / factor
+
+
+def mask(frames, channel_mask):
+    """
+    Multiply every frame by a per channel mask, e.g. [1, 0, 1] to turn green off
+
+    :param frames : frame iterable
+    :param channel_mask : list of factors in this order: [red, green, blue]
+    """
+
+    red_mask, green_mask, blue_mask = channel_mask
+    for red, green, blue in frames:
+        yield (red * red_mask, green * green_mask, blue * blue_mask)
+
+
+def channel_swap(frames, order):
+    """
+    Reorder the channels of every frame, e.g. [2, 1, 0] swaps red and blue
+
+    :param frames : frame iterable
+    :param order : list of the source channel index for red, green and blue
+    """
+
+    first, second, third = order
+    for frame in frames:
+        yield (frame[first], frame[second], frame[third])
+
+
+# Output
+
+def _fractional_lookup(table, value, top):
+
+    # Driver value between the two table entries around a fractional rgb value
+    value = min(top, max(0, value))
+    index = int(value)
+    if index == top:
+        return table[top]
+    return table[index] + (table[index + 1] - table[index]) * (value - index)
+
+
+class _FrameWriter:
+    """
+    Converts rgb frames to driver values and writes each as one PWM frame.
+    """
+
+    def __init__(self, pwm, channels, color_table, dither):
+        table = color_table if color_table is not None else DEFAULT_COLOR_TABLE
+        self.pwm = pwm
+        self.tables = (table.red, table.green, table.blue)
+        self.top = len(table.red) - 1
+        # Frames are 0-255, a deeper table takes more levels per rgb step
+        self.scale = self.top / 255
+        self.channels = channels
+        self.dither = TemporalDither() if dither else None
+
+    def write(self, frame):
+
+        # Each channel goes straight to the PWM frame, so writing a frame builds no lists
+        top = self.top
+        scale = self.scale
+        dither = self.dither
+        pwm = self.pwm
+        pwm.begin_frame()
+        for index, (channel, table, value) in enumerate(zip(self.channels, self.tables, frame)):
+            if dither is None:
+                pwm.set(channel, table[min(top, max(0, int(value * scale + 0.5)))])
+                continue
+            if value == int(value):
+                # A whole rgb value is shown exactly, the error carried so far is dropped
+                dither.errors[index] = 0.0
+            pwm.set(channel, dither.quantize_channel(index, _fractional_lookup(table, value * scale, top)))
+        pwm.commit()
+
+
+def play(frames, pwm, channels=(12, 8, 4), frame_rate=50, color_table=None, dither=True, sleep=time.sleep,
+         clock=time.monotonic, pacer=None):
+    """
+    Send frames to the LED Driver, one PWM frame per tick. When the bus falls a frame or more\
+    behind, the frames it missed are skipped so the frames still take their nominal time
+
+    :param frames : frame iterable
+    :param pwm : PWM object, or anything with the same frame methods
+    :param channels : channels in this order: [redChannel, greenChannel, blueChannel]. Defaults to (12, 8, 4)
+    :param frame_rate : frames per second. Defaults to 50
+    :param color_table : ColorTable used for the conversion. Defaults to DEFAULT_COLOR_TABLE
+    :param dither : show fractional rgb values at the driver's full resolution with temporal dithering.\
+    Defaults to True
+    :param sleep : function used to wait. Defaults to time.sleep
+    :param clock : function returning the current time in seconds. Defaults to time.monotonic
+    :param pacer : started FramePacer to pace with instead of a new one, so what it learned carries over between\
+    plays. frame_rate, sleep and clock are then the pacer's. Defaults to None
+    :return : FramePacer the frames were paced with, which holds the skipped frames and jitter
+    """
+
+    if pacer is None:
+        pacer = FramePacer(frame_rate, sleep=sleep, clock=clock)
+    writer = _FrameWriter(pwm, channels, color_table, dither)
+    frames = iter(frames)
+
+    for frame in frames:
+        writer.write(frame)
+        for _ in range(pacer.tick() - 1):
+            if next(frames, None) is None:
+                break
+    return pacer
+
+
+async def play_async(frames, pwm, channels=(12, 8, 4), frame_rate=50, color_table=None, dither=True,
+                     sleep=asyncio.sleep, clock=time.monotonic, pacer=None):
+    """
+    play for an asyncio event loop. Each frame's deadline is awaited, so other tasks run between\
+    frames. The writes themselves still happen on the loop
+
+    :param frames : frame iterable
+    :param pwm : PWM object, or anything with the same frame methods
+    :param channels : channels in this order: [redChannel, greenChannel, blueChannel]. Defaults to (12, 8, 4)
+    :param frame_rate : frames per second. Defaults to 50
+    :param color_table : ColorTable used for the conversion. Defaults to DEFAULT_COLOR_TABLE
+    :param dither : show fractional rgb values at the driver's full resolution with temporal dithering.\
+    Defaults to True
+    :param sleep : coroutine function used to wait. Defaults to asyncio.sleep
+    :param clock : function returning the current time in seconds. Defaults to time.monotonic
+    :param pacer : started FramePacer to pace with instead of a new one. frame_rate and clock are then the\
+    pacer's. Defaults to None
+    :return : FramePacer the frames were paced with, which holds the skipped frames and jitter
+    """
+
+    if pacer is None:
+        pacer = FramePacer(frame_rate, clock=clock)
+    writer = _FrameWriter(pwm, channels, color_table, dither)
+    frames = iter(frames)
+
+    for frame in frames:
+        writer.write(frame)
+        for _ in range(await pacer.tick_async(sleep) - 1):
+            if next(frames, None) is None:
+                break
+    return pacer
+
+
+class Pipeline:
+    """
+    Chain stages onto a frame iterable. Each stage method returns the pipeline, so they can be\
+    written one after another. The pipeline itself is a frame iterable.
+
+    :param frames : frame iterable to start from
+    """
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    def brightness(self, level):
+        self.frames = brightness(self.frames, level)
+        return self
+
+    def gamma(self, exponent):
+        self.frames = gamma(self.frames, exponent)
+        return self
+
+    def crossfade(self, incoming, frame_count):
+        self.frames = crossfade(self.frames, incoming, frame_count)
+        return self
+
+    def time_stretch(self, factor):
+        self.frames = time_stretch(self.frames, factor)
+        return self
+
+    def mask(self, channel_mask):
+        self.frames = mask(self.frames, channel_mask)
+        return self
+
+    def channel_swap(self, order):
+        self.frames = channel_swap(self.frames, order)
+        return self
+
+    def play(self, pwm, channels=(12, 8, 4), frame_rate=50, color_table=None, dither=True, sleep=time.sleep,
+             clock=time.monotonic):
+        """
+        Send the frames to the LED Driver, see play
+        """
+
+        return play(self.frames, pwm, channels, frame_rate, color_table, dither, sleep, clock)
@@ -1,3 +1,13 @@
 """
-Soon to be added
+Exceptions raised by paradboxes.
+
+Classes:
+
+AnimationCancelled()
 """
+
+
+class AnimationCancelled(Exception):
+    """
+    Raised inside an animation when it is cancelled, to unwind it from wherever it is waiting.
+    """
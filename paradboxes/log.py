@@ -0,0 +1,164 @@
+"""
+Logging for paradboxes. Every module logs to its own logger under "paradboxes", so levels can\
+be set per subsystem. Records are kept in an in-memory ring buffer and written to the log file\
+by a background thread, and messages are only formatted when they are written, so logging\
+never waits on the SD card in the middle of an animation. Lines logged for every frame go to\
+a subsystem's frame logger, which only lets a sample of them through.
+
+Functions:
+
+configure(filename="log.log", level=None, levels=None, capacity=1000, flush_interval=1.0, frame_sample=None)
+get_logger(subsystem)
+get_frame_logger(subsystem)
+
+Classes:
+
+RingBufferHandler(target, capacity=1000, flush_interval=1.0)
+SampleFilter(every)
+"""
+
+import atexit
+import collections
+import logging
+import threading
+
+ROOT = "paradboxes"
+FORMAT = "%(message)s %(asctime)s"
+DATE_FORMAT = " ---[%m/%d/%y %I:%M:%S %p]"
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keep log records in a fixed size ring and hand them to a target handler from a background\
+    thread. Logging a record is only an append. When the ring is full the oldest records are\
+    dropped and counted in dropped.
+
+    :param target : handler the records are written to, e.g. a logging.FileHandler
+    :param capacity : amount of records the ring holds. Defaults to 1000
+    :param flush_interval : seconds between writes to the target. Defaults to 1.0
+    """
+
+    def __init__(self, target, capacity=1000, flush_interval=1.0):
+        super().__init__()
+        self.target = target
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.__records = collections.deque(maxlen=capacity)
+        self.__records_lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__flush_periodically, name="paradboxes log", daemon=True)
+        self.__thread.start()
+
+    def emit(self, record):
+        with self.__records_lock:
+            if len(self.__records) == self.__records.maxlen:
+                self.dropped += 1
+            self.__records.append(record)
+
+    def __flush_periodically(self):
+
+        while not self.__stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """
+        Write every buffered record to the target now
+        """
+
+        with self.__records_lock:
+            records = list(self.__records)
+            self.__records.clear()
+        for record in records:
+            self.target.handle(record)
+        self.target.flush()
+
+    def close(self):
+        self.__stop.set()
+        self.__thread.join()
+        self.flush()
+        self.target.close()
+        super().close()
+
+
+class SampleFilter(logging.Filter):
+    """
+    Let one in every `every` records through.
+
+    :param every : sampling period. 1 lets everything through
+    """
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = every
+        self.__count = 0
+
+    def filter(self, record):
+        self.__count += 1
+        return (self.__count - 1) % self.every == 0
+
+
+_handler = None
+_sample_filters = []
+
+
+def configure(filename="log.log", level=None, levels=None, capacity=1000, flush_interval=1.0, frame_sample=None):
+    """
+    Set up paradboxes logging. Only the first call installs the handler and later calls only\
+    change what they are given, so every class can call it without undoing the application's\
+    settings.
+
+    :param filename : log file. Defaults to "log.log"
+    :param level : level of all paradboxes loggers. Defaults to None, which is logging.INFO on the first call
+    :param levels : dictionary of subsystem name to level, e.g. {"strip_control": logging.WARNING}. Defaults to None
+    :param capacity : records the ring buffer holds. Defaults to 1000
+    :param flush_interval : seconds between writes to the log file. Defaults to 1.0
+    :param frame_sample : log one in this many frame level lines. Defaults to None, which is 100 on the first call
+    """
+
+    global _handler
+    root = logging.getLogger(ROOT)
+
+    if _handler is None:
+        target = logging.FileHandler(filename)
+        target.setFormatter(logging.Formatter(FORMAT, DATE_FORMAT))
+        _handler = RingBufferHandler(target, capacity=capacity, flush_interval=flush_interval)
+        root.addHandler(_handler)
+        # Keep records away from whatever synchronous handlers the application put on the root logger
+        root.propagate = False
+        atexit.register(_handler.close)
+        if level is None:
+            level = logging.INFO
+
+    if level is not None:
+        root.setLevel(level)
+    for subsystem, subsystem_level in (levels or {}).items():
+        get_logger(subsystem).setLevel(subsystem_level)
+    if frame_sample is not None:
+        for sample_filter in _sample_filters:
+            sample_filter.every = frame_sample
+
+
+def get_logger(subsystem):
+    """
+    Get the logger of a subsystem, e.g. "strip_control"
+
+    :param subsystem : subsystem name
+    """
+
+    return logging.getLogger("{}.{}".format(ROOT, subsystem))
+
+
+def get_frame_logger(subsystem):
+    """
+    Get the logger for lines a subsystem logs on every frame. Only a sample of its records\
+    is kept, see configure's frame_sample
+
+    :param subsystem : subsystem name
+    """
+
+    logger = logging.getLogger("{}.{}.frames".format(ROOT, subsystem))
+    if not logger.filters:
+        sample_filter = SampleFilter(100)
+        _sample_filters.append(sample_filter)
+        logger.addFilter(sample_filter)
+    return logger
@@ -0,0 +1,803 @@
+"""
+Driver for the PCA9685 LED Driver. Kept apart from the board setup so the LED stack\
+only needs an SMBus compatible object, which can be a real bus or a simulated one\
+(see paradboxes.simulator).
+
+Classes:
+
+FrameMixin()
+PWM(bus_number=None, address=0x40, cache=True, bus=None)
+PWMGroup(bus, address, members)
+DriverBus(addresses, bus_number=None, allcall_address=0x70, bus=None)
+AsyncPWM(pwm)
+"""
+
+
+import time
+import math
+import threading
+from paradboxes import log
+
+logger = log.get_logger("pca9685")
+
+
+class FrameMixin:
+    """
+    The frame methods of PWM, shared by everything that can stand in for one. Frames nest:\
+    only the commit matching the outermost begin_frame hands the frame on, so helpers can open\
+    their own frame inside a caller's one. A class using it writes single channels with\
+    write(channel, on, off) and whole frames with _commit_frame(frame), where frame is a\
+    dictionary of channel to [on, off].
+    """
+
+    _frame_depth = 0
+
+    def begin_frame(self):
+        """
+        Start collecting channel values that commit will send together
+        """
+
+        if self._frame_depth == 0:
+            self._frame = {}
+        self._frame_depth += 1
+
+    def set(self, channel, value, on=0):
+        """
+        Set the off value of a channel in the current frame, or write it now if no frame is open
+
+        :param channel : channel number
+        :param value : off value
+        :param on : on value. Defaults to 0
+        """
+
+        if self._frame_depth == 0:
+            self.write(channel, on, value)
+        else:
+            self._frame[channel] = [on, value]
+
+    def commit(self):
+        """
+        End the current frame. The outermost commit sends it
+        """
+
+        if self._frame_depth == 0:
+            raise RuntimeError("commit was called without begin_frame")
+        self._frame_depth -= 1
+        if self._frame_depth == 0:
+            frame, self._frame = self._frame, {}
+            self._commit_frame(frame)
+
+    def _commit_frame(self, frame):
+        raise NotImplementedError
+
+
+'''
+**********************************************************************
+* Filename    : PCA9685.py
+* Description : A driver module for PCA9685
+* Author      : Cavon
+* Brand       : SunFounder
+* E-mail      : service@sunfounder.com
+* Website     : www.sunfounder.com
+* Version     : v2.0.0
+**********************************************************************
+
+This class is not my work. All credit goes to SunFounder and Cavon for creating
+this class. Thank you for making this open source
+'''
+
+
+class PWM(FrameMixin):
+    """A PWM control class for PCA9685."""
+    _MODE1              = 0x00
+    _MODE2              = 0x01
+    _SUBADR1            = 0x02
+    _SUBADR2            = 0x03
+    _SUBADR3            = 0x04
+    _ALLCALLADR         = 0x05
+    _PRESCALE           = 0xFE
+    _LED0_ON_L          = 0x06
+    _LED0_ON_H          = 0x07
+    _LED0_OFF_L         = 0x08
+    _LED0_OFF_H         = 0x09
+    _ALL_LED_ON_L       = 0xFA
+    _ALL_LED_ON_H       = 0xFB
+    _ALL_LED_OFF_L      = 0xFC
+    _ALL_LED_OFF_H      = 0xFD
+
+    _RESTART            = 0x80
+    _AI                 = 0x20
+    _SLEEP              = 0x10
+    _SUB1               = 0x08
+    _SUB2               = 0x04
+    _SUB3               = 0x02
+    _ALLCALL            = 0x01
+    _INVRT              = 0x10
+    _OUTDRV             = 0x04
+
+
+    RPI_REVISION_0 = ["900092"]
+    RPI_REVISION_1_MODULE_B  = ["Beta", "0002", "0003", "0004", "0005", "0006", "000d", "000e", "000f"]
+    RPI_REVISION_1_MODULE_A  = ["0007", "0008", "0009",]
+    RPI_REVISION_1_MODULE_BP = ["0010", "0013"]
+    RPI_REVISION_1_MODULE_AP = ["0012"]
+    RPI_REVISION_2_MODULE_B  = ["a01041", "a21041"]
+    RPI_REVISION_3_MODULE_B  = ["a02082", "a22082", "a32082"]
+    RPI_REVISION_3_MODULE_BP = ["a020d3"]
+    RPI_REVISION_3_MODULE_AP = ["9020e0", "9000c1"]
+
+    # Largest payload a single SMBus block write can carry (8 channels)
+    _BLOCK_SIZE = 32
+    # Unchanged channels a frame commit will resend to join two runs into one write
+    _FRAME_GAP = 1
+
+    _DEBUG = False
+    _DEBUG_INFO = 'DEBUG "PCA9685.py":'
+
+    def _get_bus_number(self):
+        pi_revision = self._get_pi_revision()
+        if   pi_revision == '0':
+            return 0
+        elif pi_revision == '1 Module B':
+            return 0
+        elif pi_revision == '1 Module A':
+            return 0
+        elif pi_revision == '1 Module B+':
+            return 1
+        elif pi_revision == '1 Module A+':
+            return 0
+        elif pi_revision == '2 Module B':
+            return 1
+        elif pi_revision == '3 Module B':
+            return 1
+        elif pi_revision == '3 Module B+':
+            return 1
+        elif pi_revision == '3 Module A+':
+            return 1
+
+    def _get_pi_revision(self):
+        "Gets the version number of the Raspberry Pi board"
+        # Courtesy quick2wire-python-api
+        # https://github.com/quick2wire/quick2wire-python-api
+        # Updated revision info from: http://elinux.org/RPi_HardwareHistory#Board_Revision_History
+        try:
+            f = open('/proc/cpuinfo','r')
+            for line in f:
+                if line.startswith('Revision'):
+                    if line[11:-1] in self.RPI_REVISION_0:
+                        return '0'
+                    elif line[11:-1] in self.RPI_REVISION_1_MODULE_B:
+                        return '1 Module B'
+                    elif line[11:-1] in self.RPI_REVISION_1_MODULE_A:
+                        return '1 Module A'
+                    elif line[11:-1] in self.RPI_REVISION_1_MODULE_BP:
+                        return '1 Module B+'
+                    elif line[11:-1] in self.RPI_REVISION_1_MODULE_AP:
+                        return '1 Module A+'
+                    elif line[11:-1] in self.RPI_REVISION_2_MODULE_B:
+                        return '2 Module B'
+                    elif line[11:-1] in self.RPI_REVISION_3_MODULE_B:
+                        return '3 Module B'
+                    elif line[11:-1] in self.RPI_REVISION_3_MODULE_BP:
+                        return '3 Module B+'
+                    elif line[11:-1] in self.RPI_REVISION_3_MODULE_AP:
+                        return '3 Module A+'
+                    else:
+                        print("Error. Pi revision didn't recognize, module number: %s" % line[11:-1])
+                        print('Exiting...')
+                        quit()
+        except Exception as e:
+            f.close()
+            print(e)
+            print('Exiting...')
+            quit()
+        finally:
+            f.close()
+
+    def __init__(self, bus_number=None, address=0x40, cache=True, bus=None):
+        self.address = address
+        if bus is not None:
+            # Drivers on the same I2C bus share one handle, which can also be a simulated bus
+            self.bus_number = bus_number
+            self.bus = bus
+        else:
+            if bus_number == None:
+                self.bus_number = self._get_bus_number()
+            else:
+                self.bus_number = bus_number
+            try:
+                # smbus2 can also send a whole frame as one combined transfer
+                import smbus2 as smbus
+            except ImportError:
+                import smbus
+            self.bus = smbus.SMBus(self.bus_number)
+        self._i2c_msg = self._combined_messages()
+        # Shadow copy of every register written to or read from the chip.
+        # With cache on, writes that would not change a register are dropped
+        # and reads of known registers never reach the bus.
+        self.cache = cache
+        self._registers = {}
+        self.reset_counters()
+
+    def reset_counters(self):
+        '''Zero the bus transaction counters'''
+        self.transactions_sent = 0
+        self.transactions_saved = 0
+        self.bytes_saved = 0
+
+    def invalidate_cache(self):
+        '''Forget the shadow registers, e.g. after the chip was reset by someone else'''
+        self._registers = {}
+
+    def _debug_(self,message):
+        if self._DEBUG:
+            print(self._DEBUG_INFO,message)
+
+
+    def setup(self):
+        '''Init the class with bus_number and address'''
+        self._debug_('Reseting PCA9685 MODE1 (without SLEEP) and MODE2')
+        # Auto-increment has to be on before any block write reaches the chip
+        self._write_byte_data(self._MODE1, self._ALLCALL | self._AI)
+        self.write_all_value(0, 0)
+        self._write_byte_data(self._MODE2, self._OUTDRV)
+        time.sleep(0.005)
+
+        mode1 = self._read_byte_data(self._MODE1)
+        mode1 = mode1 & ~self._SLEEP
+        self._write_byte_data(self._MODE1, mode1)
+        time.sleep(0.005)
+        self._frequency = 60
+
+    def _cached_value(self, reg):
+        '''Return the shadow value of reg, or None when it is not known'''
+        if self._ALL_LED_ON_L <= reg <= self._ALL_LED_OFF_H:
+            # The ALL_LED registers only hold a value if every channel agrees
+            offset = reg - self._ALL_LED_ON_L
+            values = set(self._registers.get(self._LED0_ON_L+4*channel+offset) for channel in range(16))
+            if len(values) == 1:
+                return values.pop()
+            return None
+        return self._registers.get(reg)
+
+    def _unchanged(self, reg, value):
+        '''Check if writing value to reg would leave the chip as it is'''
+        if reg == self._MODE1 and value & self._RESTART:
+            # Setting RESTART is an action, never a no-op
+            return False
+        return self._cached_value(reg) == value
+
+    def _store(self, reg, data):
+        '''Record data written from reg onwards in the shadow registers'''
+        for index, value in enumerate(data):
+            if reg+index == self._MODE1:
+                # The chip clears RESTART itself once the restart is done
+                self._registers[reg+index] = value & ~self._RESTART
+            elif self._ALL_LED_ON_L <= reg+index <= self._ALL_LED_OFF_H:
+                offset = reg + index - self._ALL_LED_ON_L
+                for channel in range(16):
+                    self._registers[self._LED0_ON_L+4*channel+offset] = value
+            else:
+                self._registers[reg+index] = value
+
+    def _write_byte_data(self, reg, value):
+        '''Write data to I2C with self.address'''
+        if self.cache and self._unchanged(reg, value):
+            self._debug_('Skipping value %2X to %2X, unchanged' % (value, reg))
+            self.transactions_saved += 1
+            self.bytes_saved += 1
+            return
+        self._debug_('Writing value %2X to %2X' % (value, reg))
+        try:
+            self.bus.write_byte_data(self.address, reg, value)
+        except Exception as i:
+            print(i)
+            self._check_i2c()
+        self.transactions_sent += 1
+        self._store(reg, [value])
+
+    def _combined_messages(self):
+        '''Return the i2c_msg factory of the bus, or None when it can only do SMBus transfers'''
+        if not hasattr(self.bus, 'i2c_rdwr'):
+            return None
+        message = getattr(self.bus, 'i2c_msg', None)
+        if message is None:
+            try:
+                from smbus2 import i2c_msg as message
+            except ImportError:
+                return None
+        return message
+
+    def _write_i2c_block_data(self, reg, data, combined=False):
+        '''Write a block of data to I2C with self.address, starting at reg
+
+        With combined the block is sent as one i2c_rdwr write message, which
+        has no 32 byte limit, so it is one transaction however long it is.
+        '''
+        if self.cache:
+            # Trim unchanged bytes off both ends of the block
+            first = 0
+            while first < len(data) and self._unchanged(reg+first, data[first]):
+                first += 1
+            if first == len(data):
+                self._debug_('Skipping block to %2X, unchanged' % reg)
+                self.transactions_saved += 1
+                self.bytes_saved += len(data)
+                return
+            last = len(data)
+            while self._unchanged(reg+last-1, data[last-1]):
+                last -= 1
+            self.bytes_saved += len(data) - (last - first)
+            reg, data = reg + first, data[first:last]
+        self._debug_('Writing block %s to %2X' % (' '.join('%2X' % value for value in data), reg))
+        try:
+            if combined:
+                self.bus.i2c_rdwr(self._i2c_msg.write(self.address, [reg] + list(data)))
+            else:
+                self.bus.write_i2c_block_data(self.address, reg, data)
+        except Exception as i:
+            print(i)
+            self._check_i2c()
+        self.transactions_sent += 1
+        self._store(reg, data)
+
+    def _read_byte_data(self, reg):
+        '''Read data from I2C with self.address'''
+        if self.cache and self._cached_value(reg) is not None:
+            self.transactions_saved += 1
+            return self._cached_value(reg)
+        self._debug_('Reading value from %2X' % reg)
+        try:
+            results = self.bus.read_byte_data(self.address, reg)
+            self.transactions_sent += 1
+            self._registers[reg] = results
+            return results
+        except Exception as i:
+            print(i)
+            self._check_i2c()
+
+    def _check_i2c(self):
+        import commands
+        bus_number = self._get_bus_number()
+        print("\nYour Pi Rivision is: %s" % self._get_pi_revision())
+        print("I2C bus number is: %s" % bus_number)
+        print("Checking I2C device:")
+        cmd = "ls /dev/i2c-%d" % bus_number
+        output = commands.getoutput(cmd)
+        print('Commands "%s" output:' % cmd)
+        print(output)
+        if '/dev/i2c-%d' % bus_number in output.split(' '):
+            print("I2C device setup OK")
+        else:
+            print("Seems like I2C have not been set, Use 'sudo raspi-config' to set I2C")
+        cmd = "i2cdetect -y %s" % self.bus_number
+        output = commands.getoutput(cmd)
+        print("Your PCA9685 address is set to 0x%02X" % self.address)
+        print("i2cdetect output:")
+        print(output)
+        outputs = output.split('\n')[1:]
+        addresses = []
+        for tmp_addresses in outputs:
+            tmp_addresses = tmp_addresses.split(':')[1]
+            tmp_addresses = tmp_addresses.strip().split(' ')
+            for address in tmp_addresses:
+                if address != '--':
+                    addresses.append(address)
+        print("Conneceted i2c device:")
+        if addresses == []:
+            print("None")
+        else:
+            for address in addresses:
+                print("  0x%s" % address)
+        if "%02X" % self.address in addresses:
+            print("Wierd, I2C device is connected, Try to run the program again, If problem stills, email this information to support@sunfounder.com")
+        else:
+            print("Device is missing.")
+            print("Check the address or wiring of PCA9685 Server driver, or email this information to support@sunfounder.com")
+        raise IOError('IO error')
+
+    @property
+    def frequency(self):
+        return self._frequency
+
+    @frequency.setter
+    def frequency(self, freq):
+        '''Set PWM frequency'''
+        self._debug_('Set frequency to %d' % freq)
+        self._frequency = freq
+        prescale_value = 25000000.0
+        prescale_value /= 4096.0
+        prescale_value /= float(freq)
+        prescale_value -= 1.0
+        self._debug_('Setting PWM frequency to %d Hz' % freq)
+        self._debug_('Estimated pre-scale: %d' % prescale_value)
+        prescale = math.floor(prescale_value + 0.5)
+        self._debug_('Final pre-scale: %d' % prescale)
+        if self.cache and self._cached_value(self._PRESCALE) == int(prescale):
+            # Already running at this prescale, no need to put the chip to sleep
+            self.transactions_saved += 1
+            return
+
+        old_mode = self._read_byte_data(self._MODE1);
+        new_mode = (old_mode & 0x7F) | 0x10
+        self._write_byte_data(self._MODE1, new_mode)
+        self._write_byte_data(self._PRESCALE, int(math.floor(prescale)))
+        self._write_byte_data(self._MODE1, old_mode)
+        time.sleep(0.005)
+        self._write_byte_data(self._MODE1, old_mode | 0x80)
+
+    def _channel_data(self, on, off):
+        '''Split on and off values into the four LEDn register bytes'''
+        return [on & 0xFF, on >> 8, off & 0xFF, off >> 8]
+
+    def write(self, channel, on, off):
+        '''Set on and off value on specific channel'''
+        self._debug_('Set channel "%d" to value "%d"' % (channel, off))
+        self._write_i2c_block_data(self._LED0_ON_L+4*channel, self._channel_data(on, off))
+
+    def write_channels(self, start, values):
+        '''Set on and off values on a run of channels beginning at start
+
+        values is a list of [on, off] pairs, one per channel. The run is sent
+        as one block write per 8 channels, which is the most a single SMBus
+        transaction can carry.
+        '''
+        self._debug_('Set channels "%d" to "%d" to values %s' % (start, start+len(values)-1, values))
+        data = []
+        for on, off in values:
+            data.extend(self._channel_data(on, off))
+        reg = self._LED0_ON_L+4*start
+        for index in range(0, len(data), self._BLOCK_SIZE):
+            self._write_i2c_block_data(reg+index, data[index:index+self._BLOCK_SIZE])
+
+    def _channel_value(self, channel):
+        '''Return the shadow [on, off] of a channel, or None when it is not known'''
+        data = [self._registers.get(self._LED0_ON_L+4*channel+offset) for offset in range(4)]
+        if None in data:
+            return None
+        return [data[0] | data[1] << 8, data[2] | data[3] << 8]
+
+    def _commit_frame(self, frame):
+        '''Send a frame in as few transactions as the bus allows
+
+        Only channels that differ from the last written values are sent. The
+        chip latches its outputs on the STOP that ends a transaction, so a frame
+        sent as one transaction changes every channel at the same moment.
+
+        When the bus supports combined transfers (smbus2 or the simulated bus)
+        and every channel between the first and last changed one is known, the
+        whole span goes out as one i2c_rdwr write message, with the unchanged
+        channels in between resent from the shadow registers. That frame is
+        atomic.
+
+        Otherwise the frame goes out as SMBus block writes: runs separated by no
+        more than _FRAME_GAP known channels are joined, each run of up to 8
+        channels is one transaction, and only the channels within one run
+        latch together. Channels 12, 8 and 4 are then three transactions, and
+        the outputs change one after the other.
+        '''
+        changed = sorted(channel for channel, value in frame.items() if self._channel_value(channel) != value)
+        if not changed:
+            return
+        span = range(changed[0], changed[-1] + 1)
+        if self._i2c_msg is not None and \
+                all(channel in frame or self._channel_value(channel) is not None for channel in span):
+            data = []
+            for channel in span:
+                data.extend(self._channel_data(*(frame.get(channel) or self._channel_value(channel))))
+            self._write_i2c_block_data(self._LED0_ON_L+4*changed[0], data, combined=True)
+            return
+
+        runs = []
+        for channel in changed:
+            if runs:
+                start, end = runs[-1]
+                gap = range(end + 1, channel)
+                if len(gap) <= self._FRAME_GAP and channel - start < self._BLOCK_SIZE // 4 \
+                        and all(self._channel_value(gap_channel) is not None for gap_channel in gap):
+                    runs[-1][1] = channel
+                    continue
+            runs.append([channel, channel])
+
+        for start, end in runs:
+            values = [frame.get(channel) or self._channel_value(channel) for channel in range(start, end + 1)]
+            self.write_channels(start, values)
+
+    def write_all_value(self, on, off):
+        '''Set on and off value on all channel'''
+        self._debug_('Set all channel to value "%d"' % (off))
+        self._write_i2c_block_data(self._ALL_LED_ON_L, self._channel_data(on, off))
+
+    def map(self, x, in_min, in_max, out_min, out_max):
+        '''To map the value from arange to another'''
+        return (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
+
+    @property
+    def debug(self):
+        return self._DEBUG
+
+    @debug.setter
+    def debug(self, debug):
+        '''Set if debug information shows'''
+        if debug in (True, False):
+            self._DEBUG = debug
+        else:
+            raise ValueError('debug must be "True" (Set debug on) or "False" (Set debug off), not "{0}"'.format(debug))
+
+        if self._DEBUG:
+            print(self._DEBUG_INFO, "Set debug on")
+        else:
+            print(self._DEBUG_INFO, "Set debug off")
+
+
+class PWMGroup(PWM):
+    """
+    Write to several PCA9685 drivers at once through their ALLCALL or sub-address.
+    Every write reaches all members in one transaction and is mirrored into each member's
+    shadow registers, so a value only counts as unchanged when every member already has it.
+
+    :param bus : SMBus object the members are connected to
+    :param address : ALLCALL or sub-address the members answer to
+    :param members : list of PWM objects that answer to address
+    """
+
+    def __init__(self, bus, address, members):
+        super().__init__(bus_number=getattr(members[0], 'bus_number', None), address=address, bus=bus)
+        self.members = members
+
+    def _cached_value(self, reg):
+        values = [member._cached_value(reg) for member in self.members]
+        if all(value == values[0] for value in values):
+            return values[0]
+        return None
+
+    def _channel_value(self, channel):
+        values = [member._channel_value(channel) for member in self.members]
+        if all(value == values[0] for value in values):
+            return values[0]
+        return None
+
+    def _store(self, reg, data):
+        for member in self.members:
+            member._store(reg, data)
+
+    def _read_byte_data(self, reg):
+        '''Group addresses are write only, so reads come from the members' shadow registers'''
+        value = self._cached_value(reg)
+        if value is None:
+            raise IOError("Register 0x%02X differs between the drivers of group 0x%02X" % (reg, self.address))
+        self.transactions_saved += 1
+        return value
+
+
+class DriverBus:
+    """
+    Own every PCA9685 LED Driver on one I2C bus. Every driver answers to the ALLCALL address,
+    and drivers can be put into up to three sub-address groups each. Operations that should
+    happen on several boards at once, such as a blackout or the same color everywhere, go out
+    as one broadcast transaction instead of one write per board.
+
+    :param addresses : list of the drivers' addresses
+    :param bus_number : I2C bus number. Defaults to None, which picks the Raspberry Pi's bus
+    :param allcall_address : address every driver answers to. Defaults to 0x70
+    :param bus : SMBus compatible object to use instead of opening bus_number. Defaults to None
+    """
+
+    _SUBADDRESS_SLOTS = [(PWM._SUBADR1, PWM._SUB1), (PWM._SUBADR2, PWM._SUB2), (PWM._SUBADR3, PWM._SUB3)]
+
+    def __init__(self, addresses, bus_number=None, allcall_address=0x70, bus=None):
+
+        first = PWM(bus_number=bus_number, address=addresses[0], bus=bus)
+        self.bus = first.bus
+        self.drivers = [first] + [PWM(bus_number=first.bus_number, address=address, bus=self.bus)
+                                  for address in addresses[1:]]
+        self.allcall_address = allcall_address
+        self.allcall = PWMGroup(self.bus, allcall_address, self.drivers)
+        self.groups = {}
+        self._used_slots = {driver.address: 0 for driver in self.drivers}
+
+    def driver(self, address):
+        """
+        Get the PWM object of a single driver
+
+        :param address : address of the driver
+        """
+
+        for driver in self.drivers:
+            if driver.address == address:
+                return driver
+        raise ValueError("No driver at address 0x{:02X} on this bus".format(address))
+
+    def setup(self, frequency=150):
+        """
+        Reset every driver, point them at the ALLCALL address and set their frequency
+
+        :param frequency : PWM frequency for all the drivers. Defaults to 150
+        """
+
+        for driver in self.drivers:
+            driver.setup()
+            driver.frequency = frequency
+            driver._write_byte_data(PWM._ALLCALLADR, self.allcall_address << 1)
+        logger.info("Set up %d LED Drivers", len(self.drivers))
+
+    def add_group(self, name, addresses, group_address):
+        """
+        Program a sub-address group so its drivers can be written to together
+
+        :param name : name to get the group by
+        :param addresses : list of the addresses of the drivers in the group
+        :param group_address : sub-address the group answers to
+        """
+
+        members = [self.driver(address) for address in addresses]
+        for member in members:
+            slot = self._used_slots[member.address]
+            if slot >= len(self._SUBADDRESS_SLOTS):
+                raise ValueError("Driver 0x{:02X} is already in three groups".format(member.address))
+            register, enable = self._SUBADDRESS_SLOTS[slot]
+            member._write_byte_data(register, group_address << 1)
+            mode1 = member._read_byte_data(PWM._MODE1) & ~PWM._RESTART
+            member._write_byte_data(PWM._MODE1, mode1 | enable)
+            self._used_slots[member.address] = slot + 1
+
+        self.groups[name] = PWMGroup(self.bus, group_address, members)
+        logger.info("Added LED Driver group %s at 0x%02X", name, group_address)
+        return self.groups[name]
+
+    def group(self, name=None):
+        """
+        Get the broadcast PWM object of a group. It supports write, write_channels, write_all_value\
+        and frames just like a single driver.
+
+        :param name : name of the group. Defaults to None, which is every driver through ALLCALL
+        """
+
+        if name is None:
+            return self.allcall
+        return self.groups[name]
+
+    def write_all_value(self, on, off, group=None):
+        """
+        Set every channel of every driver in the group in one transaction, e.g. a global dim
+
+        :param on : on value
+        :param off : off value
+        :param group : name of the group. Defaults to None, which is every driver
+        """
+
+        self.group(group).write_all_value(on, off)
+
+    def blackout(self, group=None):
+        """
+        Turn every channel of every driver in the group dark in one transaction
+
+        :param group : name of the group. Defaults to None, which is every driver
+        """
+
+        # The strips are driven inverted, so a full off count is black (see ColorChooser)
+        self.write_all_value(0, 4095, group=group)
+
+
+class AsyncPWM(FrameMixin):
+    """
+    Send PWM writes from a background thread so the caller never waits on I2C. Writes are\
+    queued per channel and only the newest value of a channel is kept until the writer\
+    thread gets to it, so the bus always receives the freshest state. Supports the same\
+    write, write_channels, write_all_value and frame methods as PWM. Set the driver up and\
+    pick its frequency before wrapping it.
+
+    :param pwm : PWM object that the writer thread writes with
+    """
+
+    def __init__(self, pwm):
+
+        self.pwm = pwm
+        self.coalesced = 0
+        self.error = None
+        self._pending = {}
+        self._writing = False
+        self._running = True
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self.__write_pending, name="AsyncPWM writer", daemon=True)
+        self._thread.start()
+
+    def __queue(self, values):
+
+        with self._condition:
+            if self.error is not None:
+                raise IOError("The PWM writer thread stopped: {}".format(self.error))
+            if not self._running:
+                # Nothing would ever send it
+                raise IOError("The PWM writer was closed")
+            # Values the writer has not sent yet are replaced by the newer ones
+            self.coalesced += len(self._pending.keys() & values.keys())
+            self._pending.update(values)
+            self._condition.notify()
+
+    def __write_pending(self):
+
+        while True:
+            with self._condition:
+                while not self._pending and self._running:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                values, self._pending = self._pending, {}
+                self._writing = True
+
+            try:
+                self.pwm.begin_frame()
+                for channel, (on, off) in values.items():
+                    self.pwm.set(channel, off, on=on)
+                self.pwm.commit()
+            except Exception as e:
+                logger.error("PWM writer thread stopped: %s", e)
+                with self._condition:
+                    self.error = e
+                    self._writing = False
+                    self._condition.notify_all()
+                return
+
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+    def write(self, channel, on, off):
+        """
+        Queue on and off values for a channel
+
+        :param channel : channel number
+        :param on : on value
+        :param off : off value
+        """
+
+        self.__queue({channel: [on, off]})
+
+    def write_channels(self, start, values):
+        """
+        Queue [on, off] pairs for a run of channels beginning at start
+
+        :param start : first channel number
+        :param values : list of [on, off] pairs
+        """
+
+        self.__queue({start + index: list(value) for index, value in enumerate(values)})
+
+    def write_all_value(self, on, off):
+        """
+        Queue the same on and off values for every channel
+
+        :param on : on value
+        :param off : off value
+        """
+
+        self.__queue({channel: [on, off] for channel in range(16)})
+
+    def _commit_frame(self, frame):
+
+        # The writer thread sends it as one PWM frame
+        self.__queue(frame)
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued value has been written
+
+        :param timeout : seconds to wait for at most. Defaults to None, which waits for as long as it takes
+        :return : True if everything was written, False on a timeout or when the writer thread stopped on an error
+        """
+
+        with self._condition:
+            finished = self._condition.wait_for(lambda: self.error is not None or
+                                                (not self._pending and not self._writing), timeout)
+            return finished and self.error is None
+
+    def close(self):
+        """
+        Write everything still queued and stop the writer thread
+        """
+
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._thread.join()
@@ -0,0 +1,358 @@
+"""
+The building blocks shared by everything that plays frames: pacing frames against the clock,\
+converting rgb values to driver values, dithering and drawing random values. Kept apart from\
+paradboxes.strip_control so paradboxes.effects and the other players can use them without\
+importing the Blink classes.
+
+Classes:
+
+FrameClock(frame_rate, sleep=time.sleep, clock=time.monotonic)
+FramePacer(frame_rate, sleep=time.sleep, clock=time.monotonic, headroom=0.8, smoothing=0.2)
+TemporalDither(channels=3)
+RandomStream(rng=None, seed=None, batch_size=256)
+ColorTable(gamma=1.0, white_balance=None, depth=8)
+"""
+
+import time
+import random
+import asyncio
+
+
+class FrameClock:
+    """
+    Paces frames on a fixed schedule of deadlines counted from the first frame. Time spent\
+    between ticks, writing to the bus for example, comes out of the wait instead of adding\
+    to it, so a run of frames takes frame count / frame_rate seconds. A late frame is not\
+    waited for at all, which lets the following frames catch up.
+
+    :param frame_rate : frames per second
+    :param sleep : function used to wait. Defaults to time.sleep
+    :param clock : function returning the current time in seconds. Defaults to time.monotonic
+    """
+
+    def __init__(self, frame_rate, sleep=time.sleep, clock=time.monotonic):
+        self.frame_rate = frame_rate
+        self.sleep = sleep
+        self.clock = clock
+        self.start()
+
+    def start(self):
+        """
+        Make now the start of frame 0
+        """
+
+        self.start_time = self.clock()
+        self.frame = 0
+
+    def tick(self):
+        """
+        Wait for the deadline of the next frame
+
+        :return : amount of frames to move on, always 1
+        """
+
+        self.frame += 1
+        remaining = self.start_time + self.frame / self.frame_rate - self.clock()
+        if remaining > 0:
+            self.sleep(remaining)
+        return 1
+
+    def __repr__(self):
+        return "FrameClock at {} frames per second, frame {}".format(self.frame_rate, self.frame)
+
+
+class FramePacer(FrameClock):
+    """
+    FrameClock that measures how long the work between two ticks takes, which is mostly the\
+    PWM commit, and adapts to it. Within a run, a tick that finds itself a frame or more behind\
+    skips the frames it missed, so the run still ends on time. Between runs, start lowers\
+    frame_rate to what the bus keeps up with and raises it back to nominal_rate when the bus\
+    gets faster. How late each frame started is kept as the jitter.
+
+    :param frame_rate : frames per second to aim for
+    :param sleep : function used to wait. Defaults to time.sleep
+    :param clock : function returning the current time in seconds. Defaults to time.monotonic
+    :param headroom : part of a frame period the work may take before the frame rate is lowered. Defaults to 0.8
+    :param smoothing : weight of the newest measurement in the average work time. Defaults to 0.2
+    """
+
+    def __init__(self, frame_rate, sleep=time.sleep, clock=time.monotonic, headroom=0.8, smoothing=0.2):
+        self.nominal_rate = frame_rate
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.work_time = None
+        self.max_work_time = 0.0
+        self.skipped = 0
+        self.__lateness_count = 0
+        self.__lateness_mean = 0.0
+        self.__lateness_squares = 0.0
+        self.max_lateness = 0.0
+        super().__init__(frame_rate, sleep=sleep, clock=clock)
+
+    def start(self):
+        """
+        Make now the start of frame 0, at the frame rate the measured work time allows
+        """
+
+        if self.work_time:
+            self.frame_rate = max(1.0, min(self.nominal_rate, self.headroom / self.work_time))
+        super().start()
+        self.__woke_at = self.start_time
+
+    def tick(self):
+        """
+        Measure the work since the last tick, then wait for the deadline of the next frame,\
+        skipping frames whose deadline has already passed
+
+        :return : amount of frames to move on, 1 plus the frames skipped
+        """
+
+        deadline, skip = self.__advance()
+        remaining = deadline - self.clock()
+        if remaining > 0:
+            self.sleep(remaining)
+        self.__woke(deadline)
+        return 1 + skip
+
+    async def tick_async(self, sleep=asyncio.sleep):
+        """
+        tick for an asyncio event loop, which awaits the deadline so other tasks run in the meantime
+
+        :param sleep : coroutine function used to wait. Defaults to asyncio.sleep
+        :return : amount of frames to move on, 1 plus the frames skipped
+        """
+
+        deadline, skip = self.__advance()
+        remaining = deadline - self.clock()
+        if remaining > 0:
+            await sleep(remaining)
+        self.__woke(deadline)
+        return 1 + skip
+
+    def __advance(self):
+
+        # Measure the work since the last tick and move on to the next frame that is not already late
+        now = self.clock()
+        work = now - self.__woke_at
+        self.work_time = work if self.work_time is None else \
+            self.work_time + self.smoothing * (work - self.work_time)
+        self.max_work_time = max(self.max_work_time, work)
+
+        self.frame += 1
+        deadline = self.start_time + self.frame / self.frame_rate
+        skip = int((now - deadline) * self.frame_rate)
+        if skip > 0:
+            self.frame += skip
+            self.skipped += skip
+            deadline += skip / self.frame_rate
+        return deadline, skip
+
+    def __woke(self, deadline):
+
+        self.__woke_at = self.clock()
+        self.__add_lateness(max(0.0, self.__woke_at - deadline))
+
+    def __add_lateness(self, lateness):
+
+        self.__lateness_count += 1
+        difference = lateness - self.__lateness_mean
+        self.__lateness_mean += difference / self.__lateness_count
+        self.__lateness_squares += difference * (lateness - self.__lateness_mean)
+        self.max_lateness = max(self.max_lateness, lateness)
+
+    @property
+    def mean_lateness(self):
+        """
+        Average seconds a frame started after its deadline
+        """
+
+        return self.__lateness_mean
+
+    @property
+    def jitter(self):
+        """
+        Standard deviation in seconds of how late frames started
+        """
+
+        if self.__lateness_count < 2:
+            return 0.0
+        return (self.__lateness_squares / (self.__lateness_count - 1)) ** 0.5
+
+    def report(self):
+        """
+        Get the measurements as a dictionary, e.g. to log them
+        """
+
+        return {"frame_rate": self.frame_rate, "nominal_rate": self.nominal_rate, "skipped": self.skipped,
+                "work_time": self.work_time, "max_work_time": self.max_work_time,
+                "mean_lateness": self.mean_lateness, "max_lateness": self.max_lateness, "jitter": self.jitter}
+
+    def __repr__(self):
+        return "FramePacer at {:.1f} of {} frames per second, {} frames skipped, jitter {:.2f}ms".format(
+            self.frame_rate, self.nominal_rate, self.skipped, self.jitter * 1000)
+
+
+class TemporalDither:
+    """
+    Rounds fractional driver values to whole ones while carrying each channel's rounding error\
+    into its next frame. Over a few frames the output averages out to the fractional level, which\
+    smooths fades at low brightness where one driver step is easy to see.
+
+    :param channels : amount of channels. Defaults to 3
+    """
+
+    def __init__(self, channels=3):
+        self.errors = [0.0] * channels
+
+    def quantize(self, *values):
+        """
+        Get the whole driver values (0-4095) to show this frame
+
+        :param values : fractional driver value of each channel
+        :return : list of whole driver values
+        """
+
+        return [self.quantize_channel(index, value) for index, value in enumerate(values)]
+
+    def quantize_channel(self, index, value):
+        """
+        Get the whole driver value (0-4095) of one channel to show this frame
+
+        :param index : index of the channel
+        :param value : fractional driver value of the channel
+        """
+
+        target = value + self.errors[index]
+        whole = min(4095, max(0, int(round(target))))
+        self.errors[index] = target - whole
+        return whole
+
+    def reset(self):
+        """
+        Drop the carried errors
+        """
+
+        self.errors = [0.0] * len(self.errors)
+
+
+class RandomStream:
+    """
+    Random colors, intervals and picks drawn from one generator in batches. Each kind of value\
+    is generated batch_size at a time and handed out one by one, so a frame costs a lookup\
+    instead of several calls into the generator. Two streams with the same seed give the same\
+    values in the same order.
+
+    :param rng : random.Random object or NumPy Generator to draw from. Defaults to None, which is\
+    random.Random(seed)
+    :param seed : seed of the generator made when no rng is given. Defaults to None, which seeds from the system
+    :param batch_size : amount of values generated at a time. Defaults to 256
+    """
+
+    def __init__(self, rng=None, seed=None, batch_size=256):
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.batch_size = batch_size
+        self.__numpy = hasattr(self.rng, "integers")
+        self.__colors = iter(())
+        self.__integers = {}
+
+    def __color_batch(self):
+
+        if self.__numpy:
+            return iter(self.rng.integers(0, 256, size=(self.batch_size, 3)).tolist())
+        # One call for the whole batch, three random bytes per color
+        data = self.rng.getrandbits(24 * self.batch_size).to_bytes(3 * self.batch_size, "little")
+        return iter([list(data[index:index + 3]) for index in range(0, len(data), 3)])
+
+    def __integer_batch(self, size):
+
+        if self.__numpy:
+            return iter(self.rng.integers(0, size, size=self.batch_size).tolist())
+        return iter(self.rng.choices(range(size), k=self.batch_size))
+
+    def rgb(self):
+        """
+        Get a random rgb value, [red, green, blue]
+        """
+
+        color = next(self.__colors, None)
+        if color is None:
+            self.__colors = self.__color_batch()
+            color = next(self.__colors)
+        return color
+
+    def randint(self, low, high):
+        """
+        Get a random integer from low to high, both included, like random.randint
+
+        :param low : lowest value
+        :param high : highest value
+        """
+
+        size = high - low + 1
+        integers = self.__integers.get(size)
+        value = next(integers, None) if integers is not None else None
+        if value is None:
+            integers = self.__integers[size] = self.__integer_batch(size)
+            value = next(integers)
+        return low + value
+
+    def choice(self, items):
+        """
+        Get a random item of a sequence, like random.choice
+
+        :param items : non empty sequence
+        """
+
+        return items[self.randint(0, len(items) - 1)]
+
+    def interval(self):
+        """
+        Get a random interval of 0 to 1 seconds in steps of 0.01, like chaos shows use
+        """
+
+        return self.randint(0, 100) / 100
+
+    def __repr__(self):
+        return "RandomStream drawing from {!r} in batches of {}".format(self.rng, self.batch_size)
+
+
+class ColorTable:
+    """
+    Precomputed conversion from rgb values to driver values (0-4095) for each channel, so a\
+    conversion is a single lookup. Can correct for gamma and for channels that are brighter\
+    than the others. Build one table and share it, building it is the expensive part.
+
+    :param gamma : exponent applied to the rgb value. Defaults to 1.0, no correction
+    :param white_balance : list of scale factors (0-1) in this order: [red, green, blue]. Defaults to None, no scaling
+    :param depth : bits per rgb value. 8 gives 0-255 input, 16 gives 0-65535 input to convert. Frames played\
+    through paradboxes.effects stay 0-255 and are scaled up to the table's range. Defaults to 8
+    """
+
+    def __init__(self, gamma=1.0, white_balance=None, depth=8):
+        self.gamma = gamma
+        self.white_balance = white_balance if white_balance is not None else [1.0, 1.0, 1.0]
+        self.depth = depth
+        self.red, self.green, self.blue = [self.__build_table(scale) for scale in self.white_balance]
+
+    def __build_table(self, scale):
+
+        # Same conversion as ColorChooser.convert_rgb_to_rpi, with the gamma curve and the scale added
+        top = (1 << self.depth) - 1
+        return tuple(int(4095 - ((color / top) ** self.gamma) * scale * 4095) for color in range(top + 1))
+
+    def convert(self, rgb):
+        """
+        Convert an rgb value into driver values
+
+        :param rgb : list of rgb values. Arranged as so [red, green, blue]
+        :return : tuple of driver values (red, green, blue)
+        """
+
+        return self.red[rgb[0]], self.green[rgb[1]], self.blue[rgb[2]]
+
+    def __repr__(self):
+        return "ColorTable(gamma={}, white_balance={}, depth={})".format(self.gamma, self.white_balance, self.depth)
+
+
+# Linear conversion shared by everything that does not ask for its own table
+DEFAULT_COLOR_TABLE = ColorTable()
@@ -0,0 +1,166 @@
+"""
+Keep LED strips inside the current their power supply can deliver. The current a frame draws\
+is estimated from the duty cycle of every channel and the current each channel draws when fully\
+on. A frame that goes over the budget has all of its channels scaled down by the same factor,\
+so colors keep their hue and only get dimmer. Frames are checked as NumPy arrays, one at a time\
+for live animations and all at once for compiled ones.
+
+Functions:
+
+limit_effect(effect, budget)
+
+Classes:
+
+PowerBudget(budget, channel_current=20.0, channels=16)
+LimitedPWM(pwm, budget)
+"""
+
+import numpy as np
+from paradboxes import log
+from paradboxes.compiler import CompiledEffect
+from paradboxes.pca9685 import FrameMixin
+
+logger = log.get_logger("power")
+frame_logger = log.get_frame_logger("power")
+
+
+class PowerBudget:
+    """
+    The current a set of channels may draw together. Channel values are driver off values,\
+    where 4095 is off and 0 is fully on.
+
+    :param budget : most current in mA all channels may draw together
+    :param channel_current : mA a channel draws when fully on. Either one number for every channel, a list\
+    with a number per channel or a dictionary of channel to mA, where missing channels draw nothing.\
+    Defaults to 20.0
+    :param channels : amount of channels on the LED Driver. Defaults to 16
+    """
+
+    def __init__(self, budget, channel_current=20.0, channels=16):
+        self.budget = float(budget)
+        if isinstance(channel_current, dict):
+            self.currents = np.zeros(channels)
+            for channel, current in channel_current.items():
+                self.currents[channel] = current
+        else:
+            self.currents = np.broadcast_to(np.asarray(channel_current, dtype=np.float64), (channels,)).copy()
+
+    def draw(self, values, channels=None):
+        """
+        Estimate the current frames draw
+
+        :param values : array like of driver values, shape (..., channel count)
+        :param channels : channels the last axis belongs to. Defaults to None, which is every channel in order
+        :return : mA per frame, shape (...)
+        """
+
+        currents = self.currents if channels is None else self.currents[list(channels)]
+        return (4095 - np.asarray(values, dtype=np.float64)) @ currents / 4095
+
+    def limit(self, values, channels=None):
+        """
+        Scale down every frame that draws more than the budget
+
+        :param values : array like of driver values, shape (..., channel count)
+        :param channels : channels the last axis belongs to. Defaults to None, which is every channel in order
+        :return : uint16 array of driver values, same shape. Frames within the budget are unchanged
+        """
+
+        values = np.asarray(values, dtype=np.float64)
+        draw = self.draw(values, channels)
+        scale = np.minimum(1.0, self.budget / np.maximum(draw, 1e-9))[..., np.newaxis]
+        # Round the on time down, so a limited frame never ends up above the budget
+        return (4095 - np.floor((4095 - values) * scale)).astype(np.uint16)
+
+    def __repr__(self):
+        return "PowerBudget of {}mA".format(self.budget)
+
+
+def limit_effect(effect, budget):
+    """
+    Limit every frame of a compiled animation in one go
+
+    :param effect : CompiledEffect object
+    :param budget : PowerBudget object
+    :return : new CompiledEffect object
+    """
+
+    return CompiledEffect(budget.limit(effect.values, effect.channels), effect.timestamps, effect.channels,
+                          effect.duration)
+
+
+class LimitedPWM(FrameMixin):
+    """
+    Stand in front of a PWM object and keep whatever is written through it within a power budget.\
+    The values asked for are remembered per channel, so a write to one channel is checked\
+    against the state of the whole driver, and channels that were dimmed come back up once the\
+    frame fits the budget again. Supports the same write, write_channels, write_all_value and\
+    frame methods as PWM, so it can be given to a Blink in place of one.
+
+    :param pwm : PWM object, or anything with the same frame methods
+    :param budget : PowerBudget object
+    """
+
+    def __init__(self, pwm, budget):
+        self.pwm = pwm
+        self.budget = budget
+        self.limited_frames = 0
+        self.requested = np.full(len(budget.currents), 4095.0)
+        self.__written = self.requested.astype(np.uint16)
+
+    def __apply(self, values):
+
+        for channel, value in values.items():
+            self.requested[channel] = value
+        output = self.budget.limit(self.requested)
+        if not np.array_equal(output, self.requested):
+            self.limited_frames += 1
+            frame_logger.info("Frame drawing %.0fmA limited to %.0fmA", self.budget.draw(self.requested),
+                              self.budget.budget)
+
+        # Channels outside values may have been dimmed or restored as well
+        changed = set(np.flatnonzero(output != self.__written).tolist()) | values.keys()
+        self.pwm.begin_frame()
+        for channel in sorted(changed):
+            self.pwm.set(channel, int(output[channel]))
+        self.pwm.commit()
+        self.__written = output
+
+    def write(self, channel, on, off):
+        """
+        Write the off value of a channel, dimmed if the driver would go over the budget
+
+        :param channel : channel number
+        :param on : on value. Limited channels always start at 0
+        :param off : off value
+        """
+
+        self.__apply({channel: off})
+
+    def write_channels(self, start, values):
+        """
+        Write [on, off] pairs for a run of channels beginning at start
+
+        :param start : first channel number
+        :param values : list of [on, off] pairs
+        """
+
+        self.__apply({start + index: off for index, (on, off) in enumerate(values)})
+
+    def write_all_value(self, on, off):
+        """
+        Write the same off value to every channel
+
+        :param on : on value
+        :param off : off value
+        """
+
+        self.__apply({channel: off for channel in range(len(self.requested))})
+
+    def _commit_frame(self, frame):
+
+        # The whole frame is checked against the budget and written as one PWM frame
+        self.__apply({channel: off for channel, (on, off) in frame.items()})
+
+    def __repr__(self):
+        return "LimitedPWM within {}, {} frames limited".format(self.budget, self.limited_frames)
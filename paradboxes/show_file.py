@@ -0,0 +1,164 @@
+"""
+Store long LED shows on disk in a compact binary format and play them straight from a\
+memory map, so a show loads instantly and uses the same little memory however long it is.
+
+File layout (little endian):
+- header: magic b"PBXS", version (uint8), channel count (uint8), reserved (uint16),\
+  frame rate (float32), frame count (uint32)
+- channel numbers: one uint8 per channel
+- frames: driver values (0-4095) packed as 12 bits each, two values per three bytes,\
+  padded to a whole number of pairs
+
+Functions:
+
+write_show(path, frames, frame_rate, channels)
+
+Classes:
+
+ShowFile(path)
+"""
+
+import mmap
+import struct
+import time
+from paradboxes.playback import FramePacer
+
+_MAGIC = b"PBXS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBHfI")
+
+
+def _frame_size(channel_count):
+    return 3 * ((channel_count + 1) // 2)
+
+
+def _pack_frame(values):
+
+    values = [int(value) for value in values]
+    for value in values:
+        # Anything outside 12 bits would spill into the neighbouring value
+        if not 0 <= value <= 4095:
+            raise ValueError("Driver value {} is outside 0-4095".format(value))
+    if len(values) % 2:
+        values.append(0)
+    data = bytearray()
+    for index in range(0, len(values), 2):
+        first, second = values[index], values[index + 1]
+        data += bytes((first & 0xFF, (first >> 8) | (second & 0x0F) << 4, second >> 4))
+    return data
+
+
+def write_show(path, frames, frame_rate, channels):
+    """
+    Write a show file. Frames are written as they come, so a generator can stream shows\
+    that would not fit in memory.
+
+    :param path : file path
+    :param frames : iterable of frames, each a list (or array) of driver values (0-4095), one per channel.\
+    A frame of the wrong length or with a value out of range raises ValueError
+    :param frame_rate : frames per second
+    :param channels : list of the channels the values of a frame belong to
+    :return : amount of frames written
+    """
+
+    channels = list(channels)
+    count = 0
+    with open(path, "wb") as show:
+        show.write(_HEADER.pack(_MAGIC, _VERSION, len(channels), 0, frame_rate, 0))
+        show.write(bytes(channels))
+        for frame in frames:
+            if len(frame) != len(channels):
+                raise ValueError("Frame {} has {} values, expected {}".format(count, len(frame), len(channels)))
+            show.write(_pack_frame(frame))
+            count += 1
+        # The frame count is only known once everything is written
+        show.seek(0)
+        show.write(_HEADER.pack(_MAGIC, _VERSION, len(channels), 0, frame_rate, count))
+    return count
+
+
+class ShowFile:
+    """
+    Read only, memory mapped view of a show file. Frames are decoded one at a time when\
+    they are needed.
+
+    :param path : file path
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.__file = open(path, "rb")
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, channel_count, _, self.frame_rate, self.frame_count = _HEADER.unpack_from(self.__map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError("{} is not a version {} show file".format(path, _VERSION))
+        self.channels = list(self.__map[_HEADER.size:_HEADER.size + channel_count])
+        self.__frame_size = _frame_size(channel_count)
+        self.__data_start = _HEADER.size + channel_count
+
+    def __len__(self):
+        return self.frame_count
+
+    def frame(self, index):
+        """
+        Decode one frame
+
+        :param index : frame number
+        :return : list of driver values, one per channel
+        """
+
+        if not 0 <= index < self.frame_count:
+            raise IndexError("Frame {} is outside the show's {} frames".format(index, self.frame_count))
+        offset = self.__data_start + index * self.__frame_size
+        data = self.__map[offset:offset + self.__frame_size]
+        values = []
+        for byte in range(0, len(data), 3):
+            values.append(data[byte] | (data[byte + 1] & 0x0F) << 8)
+            values.append(data[byte + 1] >> 4 | data[byte + 2] << 4)
+        return values[:len(self.channels)]
+
+    def __iter__(self):
+        for index in range(self.frame_count):
+            yield self.frame(index)
+
+    def play(self, pwm, start_frame=0, sleep=time.sleep, clock=time.monotonic):
+        """
+        Play the show at its frame rate. Frames the bus falls behind on are skipped
+
+        :param pwm : PWM object, or anything with the same frame methods
+        :param start_frame : frame to start from. Defaults to 0
+        :param sleep : function used to wait. Defaults to time.sleep
+        :param clock : function returning the current time in seconds. Defaults to time.monotonic
+        :return : FramePacer the show was paced with, which holds the skipped frames and jitter
+        """
+
+        channels = self.channels
+        pacer = FramePacer(self.frame_rate, sleep=sleep, clock=clock)
+        index = start_frame
+        while index < self.frame_count:
+            pwm.begin_frame()
+            for channel, value in zip(channels, self.frame(index)):
+                pwm.set(channel, value)
+            pwm.commit()
+            index += pacer.tick()
+        return pacer
+
+    def close(self):
+        """
+        Unmap and close the file
+        """
+
+        self.__map.close()
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return "ShowFile {} of {} frames at {} fps on channels {}".format(self.path, self.frame_count,
+                                                                          self.frame_rate, self.channels)
@@ -0,0 +1,325 @@
+"""
+Provide an in-memory stand in for the I2C bus and the PCA9685 LED Driver, so the LED stack\
+can be run and benchmarked on any computer. The simulated bus has the same methods as\
+smbus.SMBus and keeps track of how long every transaction would take on a real bus.
+
+Example:
+
+bus = SimulatedBus(clock=SimulatedBus.FAST_MODE)
+chip = bus.attach(0x40)
+pwm = PWM(bus=bus, address=0x40)
+
+Classes:
+
+SimulatedPCA9685(address=0x40)
+SimulatedMessage(address, data, read=False)
+SimulatedBus(clock=100000, byte_time=None, transaction_latency=0.0, realtime=False)
+"""
+
+import time
+
+
+class SimulatedPCA9685:
+    """
+    Register model of a PCA9685. Handles auto-increment, the ALL_LED registers, the RESTART\
+    and SLEEP bits, and the ALLCALL and sub-addresses.
+
+    :param address : I2C address of the chip. Defaults to 0x40
+    """
+
+    _MODE1 = 0x00
+    _SUBADR1 = 0x02
+    _ALLCALLADR = 0x05
+    _LED0_ON_L = 0x06
+    _LAST_LED_REGISTER = 0x45
+    _ALL_LED_ON_L = 0xFA
+    _ALL_LED_OFF_H = 0xFD
+    _PRESCALE = 0xFE
+
+    _RESTART = 0x80
+    _AI = 0x20
+    _SLEEP = 0x10
+    _SUB_BITS = [0x08, 0x04, 0x02]
+    _ALLCALL = 0x01
+
+    _OSCILLATOR = 25000000.0
+
+    def __init__(self, address=0x40):
+        self.address = address
+        self.reset()
+
+    def reset(self):
+        """
+        Put every register back to its power on value
+        """
+
+        self.registers = bytearray(256)
+        self.registers[self._MODE1] = self._SLEEP | self._ALLCALL
+        self.registers[0x01] = 0x04
+        self.registers[0x02] = 0xE2
+        self.registers[0x03] = 0xE4
+        self.registers[0x04] = 0xE8
+        self.registers[self._ALLCALLADR] = 0xE0
+        for channel in range(16):
+            # Every output starts fully off
+            self.registers[self._LED0_ON_L + 4 * channel + 3] = 0x10
+        self.registers[self._ALL_LED_OFF_H] = 0x10
+        self.registers[self._PRESCALE] = 0x1E
+
+    def answers_to(self, address):
+        """
+        Check if the chip acknowledges the address, either its own or one of its group addresses
+
+        :param address : 7 bit I2C address
+        """
+
+        mode1 = self.registers[self._MODE1]
+        if address == self.address:
+            return True
+        if mode1 & self._ALLCALL and self.registers[self._ALLCALLADR] >> 1 == address:
+            return True
+        for index, bit in enumerate(self._SUB_BITS):
+            if mode1 & bit and self.registers[self._SUBADR1 + index] >> 1 == address:
+                return True
+        return False
+
+    def __next_register(self, reg):
+
+        if not self.registers[self._MODE1] & self._AI:
+            return reg
+        # The register pointer rolls over at the end of the LED block and the end of the map
+        if reg == self._LAST_LED_REGISTER or reg == 0xFF:
+            return 0x00
+        return reg + 1
+
+    def __write_register(self, reg, value):
+
+        if reg == self._MODE1:
+            # Writing RESTART restarts the outputs, the bit itself reads back as 0
+            self.registers[reg] = value & ~self._RESTART
+        elif reg == self._PRESCALE:
+            # The prescaler can only be changed while the oscillator sleeps
+            if self.registers[self._MODE1] & self._SLEEP:
+                self.registers[reg] = value
+        elif self._ALL_LED_ON_L <= reg <= self._ALL_LED_OFF_H:
+            self.registers[reg] = value
+            for channel in range(16):
+                self.registers[self._LED0_ON_L + 4 * channel + reg - self._ALL_LED_ON_L] = value
+        else:
+            self.registers[reg] = value
+
+    def write(self, reg, data):
+        """
+        Write bytes starting at reg, the way the chip handles one I2C write transaction
+
+        :param reg : first register
+        :param data : list of byte values
+        """
+
+        for value in data:
+            self.__write_register(reg, value)
+            reg = self.__next_register(reg)
+
+    def read(self, reg, length=1):
+        """
+        Read bytes starting at reg
+
+        :param reg : first register
+        :param length : amount of bytes to read
+        """
+
+        data = []
+        for _ in range(length):
+            if self._ALL_LED_ON_L <= reg <= self._ALL_LED_OFF_H:
+                # The ALL_LED registers are write only
+                data.append(0)
+            else:
+                data.append(self.registers[reg])
+            reg = self.__next_register(reg)
+        return data
+
+    def channel(self, channel):
+        """
+        Get the [on, off] counts of a channel, without the full on and full off bits
+
+        :param channel : channel number
+        """
+
+        on_l, on_h, off_l, off_h = self.registers[self._LED0_ON_L + 4 * channel:self._LED0_ON_L + 4 * channel + 4]
+        return [(on_h & 0x0F) << 8 | on_l, (off_h & 0x0F) << 8 | off_l]
+
+    def duty_cycle(self, channel):
+        """
+        Get the fraction of each PWM period that a channel's output is high
+
+        :param channel : channel number
+        """
+
+        base = self._LED0_ON_L + 4 * channel
+        if self.registers[base + 3] & 0x10:
+            return 0.0
+        if self.registers[base + 1] & 0x10:
+            return 1.0
+        on, off = self.channel(channel)
+        return ((off - on) % 4096) / 4096.0
+
+    @property
+    def frequency(self):
+        return self._OSCILLATOR / (4096 * (self.registers[self._PRESCALE] + 1))
+
+
+class SimulatedMessage:
+    """
+    One message of a combined transfer, like smbus2.i2c_msg. Make them with write and read.
+
+    :param address : 7 bit I2C address
+    :param data : bytes to write, or a buffer the read fills
+    :param read : True for a read message. Defaults to False
+    """
+
+    def __init__(self, address, data, read=False):
+        self.addr = address
+        self.buf = data
+        self.read_message = read
+
+    @classmethod
+    def write(cls, address, data):
+        """
+        Make a write message
+
+        :param address : 7 bit I2C address
+        :param data : bytes to write, the first one is the register
+        """
+
+        return cls(address, list(data))
+
+    @classmethod
+    def read(cls, address, length):
+        """
+        Make a read message
+
+        :param address : 7 bit I2C address
+        :param length : amount of bytes to read
+        """
+
+        return cls(address, [0] * length, read=True)
+
+    def __len__(self):
+        return len(self.buf)
+
+    def __iter__(self):
+        return iter(self.buf)
+
+
+class SimulatedBus:
+    """
+    smbus.SMBus compatible bus with simulated devices attached. Every transaction is costed\
+    with a timing model: each byte takes 9 clock periods (8 bits and the acknowledge), each\
+    start and stop condition one period, and each transaction an extra fixed latency for\
+    the driver and system call overhead. The totals are kept in elapsed, transactions and\
+    bytes.
+
+    :param clock : I2C clock in Hz. Defaults to 100000 (STANDARD_MODE)
+    :param byte_time : seconds per byte. Defaults to None, which derives it from the clock
+    :param transaction_latency : extra seconds added to every transaction. Defaults to 0.0
+    :param realtime : sleep for the simulated time so the caller feels the bus. Defaults to False
+    """
+
+    STANDARD_MODE = 100000
+    FAST_MODE = 400000
+
+    # Message factory for i2c_rdwr, in place of smbus2.i2c_msg
+    i2c_msg = SimulatedMessage
+
+    # Longest block smbus will send in one transaction
+    _BLOCK_SIZE = 32
+
+    def __init__(self, clock=STANDARD_MODE, byte_time=None, transaction_latency=0.0, realtime=False):
+
+        self.clock = clock
+        self.byte_time = byte_time if byte_time is not None else 9.0 / clock
+        self.transaction_latency = transaction_latency
+        self.realtime = realtime
+        self.devices = []
+        self.reset_counters()
+
+    def reset_counters(self):
+        """
+        Zero the elapsed time, transaction and byte counters
+        """
+
+        self.elapsed = 0.0
+        self.transactions = 0
+        self.bytes = 0
+
+    def attach(self, address=0x40):
+        """
+        Attach a new simulated PCA9685 to the bus
+
+        :param address : I2C address of the chip. Defaults to 0x40
+        :return : the SimulatedPCA9685 object
+        """
+
+        device = SimulatedPCA9685(address)
+        self.devices.append(device)
+        return device
+
+    def __transaction(self, address, byte_count, conditions=2):
+
+        cost = byte_count * self.byte_time + conditions / float(self.clock) + self.transaction_latency
+        self.elapsed += cost
+        self.transactions += 1
+        self.bytes += byte_count
+        if self.realtime:
+            time.sleep(cost)
+
+        devices = [device for device in self.devices if device.answers_to(address)]
+        if not devices:
+            # Same error the kernel gives when nothing acknowledges the address
+            raise IOError(121, "Remote I/O error")
+        return devices
+
+    def write_byte_data(self, address, reg, value):
+        for device in self.__transaction(address, 3):
+            device.write(reg, [value])
+
+    def write_i2c_block_data(self, address, reg, data):
+        if len(data) > self._BLOCK_SIZE:
+            raise ValueError("Block writes are limited to {} bytes".format(self._BLOCK_SIZE))
+        for device in self.__transaction(address, 2 + len(data)):
+            device.write(reg, list(data))
+
+    def read_byte_data(self, address, reg):
+        # Address and register, repeated start, address and one data byte
+        return self.__transaction(address, 4, conditions=3)[0].read(reg)[0]
+
+    def read_i2c_block_data(self, address, reg, length=_BLOCK_SIZE):
+        return self.__transaction(address, 3 + length, conditions=3)[0].read(reg, length)
+
+    def i2c_rdwr(self, *messages):
+        """
+        Send messages as one combined transfer, joined by repeated starts and ended by a single\
+        stop, like smbus2.SMBus.i2c_rdwr. There is no block size limit. A write message's\
+        first byte is the register, a read message reads from where the last write left off
+
+        :param messages : SimulatedMessage objects
+        """
+
+        # One address byte per message, one start per message and the final stop
+        byte_count = sum(len(message) + 1 for message in messages)
+        devices = self.__transaction(messages[0].addr, byte_count, conditions=len(messages) + 1)
+        register = 0
+        for message in messages:
+            if message.addr != messages[0].addr:
+                devices = [device for device in self.devices if device.answers_to(message.addr)]
+                if not devices:
+                    raise IOError(121, "Remote I/O error")
+            if message.read_message:
+                message.buf[:] = devices[0].read(register, len(message))
+            else:
+                register = message.buf[0]
+                for device in devices:
+                    device.write(register, message.buf[1:])
+
+    def close(self):
+        pass
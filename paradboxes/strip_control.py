@@ -4,14 +4,32 @@ with one led strip color control class, blink.
 
 Classes:
 
+AnimationRunner()
 Blink(self, pins, channels=[12, 8, 4], rgb=None, interval=0.1, timeout=10, sequence=None,
-      interval_sequence=None, random_sequence=False, soft=False, random=False, chaos=False, random_rgb_start=None)
-ColorChooser(rgb)
+      interval_sequence=None, random_sequence=False, soft=False, random=False, chaos=False, random_rgb_start=None,
+      color_table=None, frame_rate=50, fade_duration=None, seed=None, rng=None)
+ColorChooser(rgb, color_table=None)
+Color(red, green, blue)
+
+FrameClock, FramePacer, TemporalDither, RandomStream, ColorTable and DEFAULT_COLOR_TABLE live in\
+paradboxes.playback and are imported here as well.
 """
 
-import logging
 import time
-import random
+import numbers
+import asyncio
+import itertools
+import threading
+from paradboxes import log
+from paradboxes import effects
+from paradboxes.exceptions import AnimationCancelled
+from paradboxes.playback import FrameClock, FramePacer, TemporalDither, RandomStream, ColorTable, DEFAULT_COLOR_TABLE
+
+__all__ = ["AnimationRunner", "Blink", "ColorChooser", "Color", "FrameClock", "FramePacer", "TemporalDither",
+           "RandomStream", "ColorTable", "DEFAULT_COLOR_TABLE"]
+
+logger = log.get_logger("strip_control")
+frame_logger = log.get_frame_logger("strip_control")
 
 
 class Blink:
@@ -37,18 +55,24 @@ class Blink:
     :param random : force the strip to go through colors randomly
     :param chaos : random colors and random intervals. Soft can not be combined with this
     :param random_rgb_start : starting point for random colors. Defaults to None
+    :param color_table : ColorTable used to convert rgb values to driver values. Defaults to DEFAULT_COLOR_TABLE
+    :param frame_rate : frames per second of soft color changes. Defaults to 50
+    :param fade_duration : seconds a soft color change takes. Defaults to None, which is interval * 255
+    :param seed : seed of the random colors and intervals, so random and chaos shows can be played again\
+    exactly. Defaults to None, which gives a different show every time
+    :param rng : random.Random object or NumPy Generator to draw random values from instead of a seeded one.\
+    Defaults to None
     """
 
     def __init__(self, pwm, channels=[12, 8, 4], rgb=None, interval=0.1, timeout=10, sequence=None,
                  interval_sequence=None, random_sequence=False, soft=False, random=False, chaos=False,
-                 random_rgb_start=None):
+                 random_rgb_start=None, color_table=None, frame_rate=50, fade_duration=None, seed=None, rng=None):
 
         # Configure logging
         if channels is None:
             channels = [12, 8, 4]
-        logging.basicConfig(format="%(message)s %(asctime)s", datefmt=" ---[%m/%d/%y %I:%M:%S %p]", filename="log.log",
-                            level=logging.INFO)
-        logging.info("Created Blink Object")
+        log.configure()
+        logger.info("Created Blink Object")
 
         self.pwm = pwm
         self.channels = channels
@@ -62,7 +86,17 @@ class Blink:
         self.random = random
         self.chaos = chaos
         self.random_rgb_start = random_rgb_start
+        self.color_table = color_table if color_table is not None else DEFAULT_COLOR_TABLE
+        self.frame_rate = frame_rate
+        self.fade_duration = fade_duration
+        self.seed = seed
+        self.rng = rng
         self.current_color = []
+        self.pacer = None
+        self.__control = threading.Condition()
+        self.__cancelled = False
+        self.__paused_at = None
+        self.__paused_time = 0.0
         self.__separate_channels()
         self.__check_sequence_and_rgb_are_real()
 
@@ -76,108 +110,201 @@ class Blink:
         self.green_channel = self.channels[1]
         self.blue_channel = self.channels[2]
 
-    def start(self):
-        """
-        Starts the correct function based on the parameters that were passed in
+    def start(self, crossfade_from=None, crossfade=0.0):
         """
+        Play the frames of frames(), the mode picked by the parameters that were passed in. The frames\
+        are built at the frame rate the pacer settled on, which is frame_rate unless the bus is too slow for it
 
-        logging.info("Started an LED Strip Blink Animation")
-        self.__start_correct_function()
-
-    def __start_correct_function(self):
+        :param crossfade_from : rgb value to blend from into the animation. Defaults to None, no blend
+        :param crossfade : seconds the blend takes. Defaults to 0.0
+        """
 
-        if self.__sequence_exist():
-            function = self.__get_correct_sequence_function
-            self.__call_function_timeout_times(function)
-        elif self.random and self.soft:
-            if self.random_rgb_start is not None:
-                self.current_random_rgb = self.random_rgb_start
-            else:
-                self.current_random_rgb = self.__get_random_rgb()
-            self.__call_function_timeout_times(self.__random_soft_start)
-        elif self.random:
-            if self.interval_sequence is not None:
-                self.current_interval_index = -1
-            self.__call_function_timeout_times(self.__random_start)
-        elif self.chaos:
-            self.__call_function_timeout_times(self.__chaos_start)
-        else:
-            self.__call_function_timeout_times(self.__regular_start)
+        self._reset_control()
+        self._play(crossfade_from, crossfade)
+
+    def _play(self, crossfade_from=None, crossfade=0.0):
+        # start without clearing cancel and pause. AnimationRunner clears them before its thread starts,
+        # so a cancel that comes in before the thread gets going still stops the animation
+        logger.info("Started an LED Strip Blink Animation")
+        pacer = self.__pacer()
+        frames = self.frames(pacer.frame_rate)
+        if crossfade_from and crossfade > 0:
+            # The blend is part of the play, so a cancel during it stops the whole animation
+            frames = effects.crossfade(itertools.repeat(tuple(crossfade_from)), frames,
+                                       max(1, int(round(crossfade * pacer.frame_rate))))
+        try:
+            effects.play(self.__tracked(frames), self.pwm, self.channels, color_table=self.color_table, pacer=pacer)
+        except AnimationCancelled:
+            logger.info("LED Strip Blink Animation cancelled")
+        logger.info("LED Strip Blink Animation pacing: %s", pacer.report())
+
+    def __tracked(self, frames):
+
+        # Keep current_color on the frame being shown, AnimationRunner crossfades from it. The frame itself
+        # is kept, rounding it here would cost a list every frame. A frame the pacer does not wait for never
+        # reaches _sleep, so cancel is checked here as well
+        for frame in frames:
+            if self.__cancelled:
+                raise AnimationCancelled()
+            self.current_color = frame
+            yield frame
+
+    async def run(self):
+        """
+        Play the animation on the asyncio event loop, awaiting each frame's deadline instead of\
+        sleeping, so sensor events and network I/O keep running alongside it. Plays the frames of\
+        frames() through the same dither and FramePacer as start. Cancel, pause and resume work as\
+        with start, and so does cancelling the task
+        """
 
-    def __sequence_exist(self):
+        logger.info("Started an LED Strip Blink Animation on the event loop")
+        self._reset_control()
+        pacer = self.__pacer()
+        try:
+            await effects.play_async(self.__tracked(self.frames(pacer.frame_rate)), self.pwm, self.channels,
+                                     color_table=self.color_table, sleep=self.__sleep_async, pacer=pacer)
+        except AnimationCancelled:
+            logger.info("LED Strip Blink Animation cancelled")
+        logger.info("LED Strip Blink Animation pacing: %s", pacer.report())
+
+    async def __sleep_async(self, seconds):
+
+        # _sleep for the event loop. Cancel and pause are checked at least once a frame
+        frame_period = 1 / self.frame_rate
+        deadline = self._now() + seconds
+        while True:
+            with self.__control:
+                cancelled, paused = self.__cancelled, self.__paused_at is not None
+            if cancelled:
+                raise AnimationCancelled()
+            remaining = deadline - self._now()
+            if not paused and remaining <= 0:
+                return
+            await asyncio.sleep(frame_period if paused else min(remaining, frame_period))
+
+    def _reset_control(self):
+
+        # A cancel or pause of an earlier play must not carry over into this one
+        with self.__control:
+            self.__cancelled = False
+            self.__paused_at = None
+            self.__paused_time = 0.0
+
+    def cancel(self):
+        """
+        Stop the animation at its next frame. Safe to call from any thread
+        """
 
-        if self.sequence is not None:
-            return True
-        else:
-            return False
-
-    def __get_correct_sequence_function(self):
-
-        if self.random_sequence and self.soft:
-            self.current_random_rgb = self.__get_random_rgb_from_sequence_index()
-            return self.__go_through_sequence_randomly_softly
-        elif self.random_sequence:
-            return self.__go_through_sequence_randomly
-        elif self.soft:
-            self.current_index = 0
-            return self.__go_through_sequence_softly
-        else:
-            return self.__go_through_sequence
+        with self.__control:
+            self.__cancelled = True
+            self.__control.notify_all()
 
-    def __go_through_sequence_randomly_softly(self):
+    def pause(self):
+        """
+        Hold the animation at its next frame until resume is called. Safe to call from any thread
+        """
 
-        logging.info("Starting random soft sequence LED Strip Animation")
-        current_random_rgb = self.current_random_rgb
-        next_random_rgb = self.__get_random_rgb_from_sequence_index()
-        self.go_to_color(current_random_rgb.rgb, next_random_rgb.rgb)
-        self.current_random_rgb = next_random_rgb
+        with self.__control:
+            if self.__paused_at is None:
+                self.__paused_at = time.monotonic()
+            self.__control.notify_all()
 
-    def __get_random_rgb_from_sequence_index(self):
+    def resume(self):
+        """
+        Carry on a paused animation from where it was paused. Safe to call from any thread
+        """
 
-        sequence_size = len(self.sequence) - 1
-        random_index = random.randint(0, sequence_size)
-        random_rgb = self.sequence[random_index]
-        return random_rgb
+        with self.__control:
+            if self.__paused_at is not None:
+                self.__paused_time += time.monotonic() - self.__paused_at
+                self.__paused_at = None
+            self.__control.notify_all()
 
-    def go_to_color(self, current_rgb, next_rgb):
+    def frames(self, frame_rate=None):
         """
-        Go from current_rgb to next_rgb one rgb value at a time. Going through the following values: red, green, blue
+        Get the animation as a generator of rgb frames, to chain through the stages of\
+        paradboxes.effects instead of playing it with start
 
-        :param current_rgb : starting rgb value
-        :param next_rgb : ending rgb value
+        :param frame_rate : frames per second to build the frames at. Defaults to None, which is frame_rate
         """
 
-        color_one = ColorChooser(current_rgb)
-        color_two = ColorChooser(next_rgb)
-        current_red, current_green, current_blue = color_one.separate_rgb()
-        next_red, next_green, next_blue = color_two.separate_rgb()
+        return effects.from_blink(self, frame_rate)
 
-        logging.info("Changing LED Strip color from {} to {}".format(current_rgb, next_rgb))
-        self.__increase_decrease(current_red, next_red, self.red_channel)
-        self.__increase_decrease(current_green, next_green, self.green_channel)
-        self.__increase_decrease(current_blue, next_blue, self.blue_channel)
-        logging.info("Changed LED Strip color from {} to {}".format(current_rgb, next_rgb))
-
-        self.current_color = next_rgb
+    def random_values(self):
+        """
+        Get a new RandomStream for the random parts of the animation. With a seed every stream\
+        gives the same values, which is what makes seeded shows repeat
+        """
 
-    def __increase_decrease(self, color, second_color, channel):
+        return RandomStream(rng=self.rng, seed=self.seed)
 
-        if color > second_color:
-            self.__decrease_color_to_color(color, second_color, channel)
-        else:
-            self.__increase_color_to_color(color, second_color, channel)
-
-    def __decrease_color_to_color(self, first_color, second_color, channel):
+    def starting_color(self):
+        """
+        Get the first color the animation will show, or None if it starts on a random color
+        """
 
-        for color in range(first_color, second_color - 1, -1):
-            self.change_channel_color(color, channel)
-            time.sleep(self.interval)
+        if self.sequence is not None and not self.random_sequence:
+            return self.sequence[0]
+        if self.rgb is not None and not self.random and not self.chaos:
+            return self.rgb
+        return self.random_rgb_start
+
+    def _now(self):
+        # Animation time, which stands still while paused
+        with self.__control:
+            now = self.__paused_at if self.__paused_at is not None else time.monotonic()
+            return now - self.__paused_time
+
+    def _sleep(self, seconds):
+        # Every wait of the animation goes through here so cancel and pause take effect within a frame
+        with self.__control:
+            deadline = self._now() + seconds
+            while True:
+                if self.__cancelled:
+                    raise AnimationCancelled()
+                if self.__paused_at is not None:
+                    self.__control.wait()
+                    continue
+                remaining = deadline - self._now()
+                if remaining <= 0:
+                    return
+                self.__control.wait(remaining)
+
+    def go_to_color(self, current_rgb, next_rgb, duration=None):
+        """
+        Fade from current_rgb to next_rgb, writing the three channels as one frame per step. The fade\
+        runs at frame_rate and takes the same time no matter how far apart the colors are. It\
+        steps through the driver's 4096 levels rather than the 256 rgb values, and levels that\
+        fall between two driver values are dithered over time. Frames are paced by the Blink's\
+        FramePacer, kept in pacer, which drops frames or lowers the frame rate when the bus is\
+        too slow for frame_rate.
 
-    def __increase_color_to_color(self, first_color, second_color, channel):
+        :param current_rgb : starting rgb value
+        :param next_rgb : ending rgb value
+        :param duration : seconds the fade takes. Defaults to None, which is fade_duration
+        """
 
-        for color in range(first_color, second_color - 1):
-            self.change_channel_color(color, channel)
-            time.sleep(self.interval)
+        if duration is None:
+            duration = self.fade_duration if self.fade_duration is not None else self.interval * 255
+        self._reset_control()
+        pacer = self.__pacer()
+        frame_logger.info("Changing LED Strip color from %s to %s", current_rgb, next_rgb)
+        try:
+            effects.play(self.__tracked(effects.fade(current_rgb, next_rgb, duration, pacer.frame_rate)), self.pwm,
+                         self.channels, color_table=self.color_table, pacer=pacer)
+            self.current_color = next_rgb
+        except AnimationCancelled:
+            logger.info("LED Strip color change cancelled")
+        logger.info("Changed LED Strip color from %s to %s, pacing: %s", current_rgb, next_rgb, pacer.report())
+
+    def __pacer(self):
+
+        # Keep one pacer across fades so what it learned about the bus carries over. A copy of this
+        # Blink with its own clock, like the one compile_blink plays, gets a pacer of its own
+        if self.pacer is None or self.pacer.sleep != self._sleep or self.pacer.nominal_rate != self.frame_rate:
+            self.pacer = FramePacer(self.frame_rate, sleep=self._sleep, clock=self._now)
+        self.pacer.start()
+        return self.pacer
 
     def change_channel_color(self, color, channel):
         """
@@ -187,32 +314,13 @@ class Blink:
         :param channel : channel of the
         """
 
-        value = ColorChooser([0, 0, 0]).convert_rgb_to_rpi(color)
-        self.pwm.write(channel, 0, value)
-
-    def __call_function_timeout_times(self, function):
-        while self.timeout >= 0:
-            function()
-            self.timeout -= 1
-
-    def __go_through_sequence_randomly(self):
-        logging.info("Starting random sequence LED Strip Animation")
-        random_rgb = self.__get_random_rgb_from_sequence_index()
-        self.change_strip_color(random_rgb)
-        time.sleep(self.interval)
-
-    def __go_through_sequence_softly(self):
-        logging.info("Starting softly sequence LED Strip Animation")
-        current_rgb = self.sequence[self.current_index]
-
-        if self.current_index == len(self.sequence) - 2:
-            self.current_index = 0
-            next_rgb = self.sequence[self.current_index]
+        if channel == self.green_channel:
+            value = self.color_table.green[color]
+        elif channel == self.blue_channel:
+            value = self.color_table.blue[color]
         else:
-            next_rgb = self.sequence[self.current_index + 1]
-
-        self.go_to_color(current_rgb, next_rgb)
-        self.current_index += 1
+            value = self.color_table.red[color]
+        self.pwm.write(channel, 0, value)
 
     def change_strip_color(self, rgb):
         """
@@ -221,61 +329,31 @@ class Blink:
         :param rgb : rgb value in a list. [red, green, blue]
         """
 
-        logging.info("Changing LED Strip color to {}".format(rgb))
+        frame_logger.info("Changing LED Strip color to %s", rgb)
 
         self.current_color = rgb
-        red_off = ColorChooser([0, 0, 0]).convert_rgb_to_rpi(rgb[0])
-        green_off = ColorChooser([0, 0, 0]).convert_rgb_to_rpi(rgb[1])
-        blue_off = ColorChooser([0, 0, 0]).convert_rgb_to_rpi(rgb[2])
-
-        self.pwm.write(self.red_channel, 0, red_off)
-        self.pwm.write(self.green_channel, 0, green_off)
-        self.pwm.write(self.blue_channel, 0, blue_off)
-
-    def __go_through_sequence(self):
-        logging.info("Starting regular sequence LED Strip Animation")
-        for rgb in self.sequence:
-            self.change_strip_color(rgb)
-            time.sleep(self.interval)
-
-    def __random_soft_start(self):
-        logging.info("Starting random soft LED Strip Animation")
-        current_random_rgb = self.current_random_rgb
-        next_random_rgb = self.__get_random_rgb()
-        self.go_to_color(current_random_rgb, next_random_rgb)
-        self.current_random_rgb = next_random_rgb
-
-    def __get_random_rgb(self):
-        rgb = list()
-        rgb.append(random.randint(0, 255))
-        rgb.append(random.randint(0, 255))
-        rgb.append(random.randint(0, 255))
-        return rgb
-
-    def __random_start(self):
-        logging.info("Starting random LED Strip Animation")
-        rgb = self.__get_random_rgb()
-        self.change_strip_color(rgb)
-        if self.interval_sequence is not None:
-            self.current_interval_index += 1
-            self.interval = self.interval_sequence[self.current_interval_index]
-        time.sleep(0.1)
-        self.change_strip_color([255, 255, 255])
-        time.sleep(self.interval)
-
-    def __regular_start(self):
-        logging.info("Starting regular LED Strip Animation")
-        self.change_strip_color(self.rgb)
-        time.sleep(self.interval)
-        self.change_strip_color([0, 0, 0])
-        time.sleep(self.interval)
-
-    def __chaos_start(self):
-        logging.info("Starting chaos LED Strip Animation")
-        interval = random.randint(0, 100) / 100
-        rgb = self.__get_random_rgb()
-        self.change_strip_color(rgb)
-        time.sleep(interval)
+        self.__write_rgb(rgb)
+
+    def __driver_values(self, rgb):
+
+        if isinstance(rgb, Color):
+            return rgb.driver_values(self.color_table)
+        return self.color_table.convert(rgb)
+
+    def __write_rgb(self, rgb):
+
+        self.current_color = rgb
+        self.__write_driver_values(*self.__driver_values(rgb))
+
+    def __write_driver_values(self, red_off, green_off, blue_off):
+
+        # One frame per color change. It is one transaction, latched at once, when the bus can do combined
+        # transfers, otherwise every block write of it latches on its own (see PWM.commit)
+        self.pwm.begin_frame()
+        self.pwm.set(self.red_channel, red_off)
+        self.pwm.set(self.green_channel, green_off)
+        self.pwm.set(self.blue_channel, blue_off)
+        self.pwm.commit()
 
     def __repr__(self):
         return "Blink the LED Strip @ channel: {}, {}, {}".format(self.channels[0], self.channels[1], self.channels[2])
@@ -284,12 +362,101 @@ class Blink:
         return "Blink an LED Strip with {}s between blinks.".format(self.interval)
 
 
+class AnimationRunner:
+    """
+    Play Blink animations on a background thread so the caller stays free to react to taps,\
+    messages and so on. Cancel, pause and resume take effect within one frame, and replace\
+    crossfades from whatever color is showing into the next animation.
+    """
+
+    def __init__(self):
+        self.effect = None
+        self.__thread = None
+
+    def play(self, effect, crossfade_from=None, crossfade=0.0):
+        """
+        Start playing an animation. Cancels the one that is playing, if any
+
+        :param effect : Blink object
+        :param crossfade_from : rgb value to blend from into the animation. Defaults to None, no blend
+        :param crossfade : seconds the blend takes. Defaults to 0.0
+        """
+
+        self.cancel()
+        self.effect = effect
+        effect._reset_control()
+        self.__thread = threading.Thread(target=effect._play, args=(crossfade_from, crossfade),
+                                         name="AnimationRunner", daemon=True)
+        self.__thread.start()
+
+    def replace(self, effect, crossfade=0.5):
+        """
+        Swap the playing animation for another one, fading from the current color into its first color
+
+        :param effect : Blink object
+        :param crossfade : seconds the fade takes. Defaults to 0.5
+        """
+
+        current_color = self.effect.current_color if self.effect is not None else None
+        self.play(effect, crossfade_from=current_color, crossfade=crossfade)
+
+    def cancel(self):
+        """
+        Stop the playing animation and wait for its thread to finish
+        """
+
+        if self.effect is not None:
+            self.effect.cancel()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def pause(self):
+        """
+        Hold the playing animation
+        """
+
+        if self.effect is not None:
+            self.effect.pause()
+
+    def resume(self):
+        """
+        Carry on the paused animation
+        """
+
+        if self.effect is not None:
+            self.effect.resume()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the playing animation to finish
+
+        :param timeout : seconds to wait for at most. Defaults to None, which waits for as long as it takes
+        :return : True if nothing is playing anymore
+        """
+
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+        return not self.running
+
+    @property
+    def running(self):
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def __repr__(self):
+        return "AnimationRunner playing {!r}".format(self.effect)
+
+
 class ColorChooser:
     """
     Holder for colors in two types. Driver, 0-4095, and rgb, a 0-255 value.
+
+    :param rgb : list of rgb values. Arranged as so [red, green, blue]
+    :param color_table : ColorTable used for the conversion. Defaults to DEFAULT_COLOR_TABLE
     """
 
-    def __init__(self, rgb):
+    def __init__(self, rgb, color_table=None):
+        self.color_table = color_table if color_table is not None else DEFAULT_COLOR_TABLE
         self.rgb = rgb
         self.rpi = []
         self.red, self.green, self.blue = self.get_converted_colors(self.rgb)
@@ -305,10 +472,7 @@ class ColorChooser:
         self.red, self.green, self.blue = self.get_converted_colors(self.rgb)
 
     def get_converted_colors(self, colors):
-        red = self.convert_rgb_to_rpi(colors[0])
-        green = self.convert_rgb_to_rpi(colors[1])
-        blue = self.convert_rgb_to_rpi(colors[2])
-        return red, green, blue
+        return self.color_table.convert(colors)
 
     def __repr__(self):
         return "ColorChooser Object {}, red={}, green={}, blue={}".format(self, self.red, self.green, self.blue)
@@ -327,6 +491,9 @@ class ColorChooser:
         # So to convert regular rgb values to the drivers values we need to divide by 255
         # Then multiple it by 4095 so that the pwm pin can read the value
         # Then do 4095 minus the value, and round. (Driver doesn't take floats)
+        # Whole values are already worked out in the default table
+        if isinstance(color, int) and 0 <= color <= 255:
+            return DEFAULT_COLOR_TABLE.red[color]
         off_color = int(4095 - ((color / 255) * 4095))
         return off_color
 
@@ -335,24 +502,142 @@ class ColorChooser:
         green = self.rgb[1]
         blue = self.rgb[2]
         return red, green, blue
-#
-# class Color():
-#     """
-#     DocString
-#     """
-#
-#     RED = ColorChooser().set_color([255, 0, 0]).rgb
-#     GREEN = ColorChooser().set_color([0, 255, 0]).rgb
-#     BLACK = ColorChooser().set_color([0, 0, 0]).rgb
-#     WHITE = ColorChooser().set_color([255, 255, 255]).rgb
-#     BLUE = ColorChooser().set_color([0, 0, 255]).rgb
-#     CYAN = ColorChooser().set_color([0, 255, 255]).rgb
-#     MAGENTA = ColorChooser().set_color([255, 0, 255]).rgb
-#     SILVER = ColorChooser().set_color([192, 192, 192]).rgb
-#     GRAY = ColorChooser().set_color([128, 128, 128]).rgb
-#     MAROON = ColorChooser().set_color([128, 0, 0]).rgb
-#     OLIVE = ColorChooser().set_color([128, 128, 0]).rgb
-#     PURPLE = ColorChooser().set_color([128, 0, 128]).rgb
-#     TEAL = ColorChooser().set_color([0, 128, 128]).rgb
-#     NAVY = ColorChooser().set_color([0, 0, 128]).rgb
-#     TURQUOISE = ColorChooser().set_color([64, 224, 208]).rgb
+
+
+class Color:
+    """
+    Immutable rgb color that can be used anywhere a [red, green, blue] list can. The driver values\
+    of a color are worked out once and kept, and named colors are shared instances, so passing\
+    colors around an animation loop allocates nothing. A color equals the list or tuple of its\
+    values, and hashes like the tuple.
+
+    :param red : red value (0-255)
+    :param green : green value (0-255)
+    :param blue : blue value (0-255)
+    """
+
+    __slots__ = ("red", "green", "blue", "_driver")
+
+    _interned = {}
+
+    def __init__(self, red, green, blue):
+        Color.__check_values(red, green, blue)
+        object.__setattr__(self, "red", red)
+        object.__setattr__(self, "green", green)
+        object.__setattr__(self, "blue", blue)
+        object.__setattr__(self, "_driver", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Color is immutable")
+
+    @staticmethod
+    def __check_values(*values):
+        for value in values:
+            if not isinstance(value, numbers.Integral) or not 0 <= value <= 255:
+                raise ValueError("Color values must be whole numbers from 0 to 255, not {!r}".format(value))
+
+    @classmethod
+    def intern(cls, red, green, blue):
+        """
+        Get the shared instance of a color, creating it the first time
+
+        :param red : red value (0-255)
+        :param green : green value (0-255)
+        :param blue : blue value (0-255)
+        """
+
+        Color.__check_values(red, green, blue)
+        key = red << 16 | green << 8 | blue
+        color = cls._interned.get(key)
+        if color is None:
+            color = cls._interned[key] = cls(red, green, blue)
+        return color
+
+    @classmethod
+    def from_packed(cls, value):
+        """
+        Get the color of a 0xRRGGBB integer
+
+        :param value : packed color
+        """
+
+        return cls(value >> 16 & 0xFF, value >> 8 & 0xFF, value & 0xFF)
+
+    @property
+    def packed(self):
+        return self.red << 16 | self.green << 8 | self.blue
+
+    @property
+    def rgb(self):
+        return [self.red, self.green, self.blue]
+
+    @property
+    def driver(self):
+        """
+        Driver values (red, green, blue) through DEFAULT_COLOR_TABLE, worked out on first use
+        """
+
+        if self._driver is None:
+            object.__setattr__(self, "_driver", DEFAULT_COLOR_TABLE.convert(self))
+        return self._driver
+
+    def driver_values(self, color_table):
+        """
+        Driver values (red, green, blue) through a given table. Only the default table is cached
+
+        :param color_table : ColorTable object
+        """
+
+        if color_table is DEFAULT_COLOR_TABLE:
+            return self.driver
+        return color_table.convert(self)
+
+    def __getitem__(self, index):
+        if index == 0:
+            return self.red
+        if index == 1:
+            return self.green
+        if index == 2:
+            return self.blue
+        return (self.red, self.green, self.blue)[index]
+
+    def __iter__(self):
+        yield self.red
+        yield self.green
+        yield self.blue
+
+    def __len__(self):
+        return 3
+
+    def __eq__(self, other):
+        if isinstance(other, Color):
+            return self.packed == other.packed
+        if isinstance(other, (list, tuple)) and len(other) == 3:
+            return self.red == other[0] and self.green == other[1] and self.blue == other[2]
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.red, self.green, self.blue))
+
+    def __repr__(self):
+        return "Color({}, {}, {})".format(self.red, self.green, self.blue)
+
+    def __str__(self):
+        return "Color is: red={}, green={}, blue={}".format(self.red, self.green, self.blue)
+
+
+Color.RED = Color.intern(255, 0, 0)
+Color.GREEN = Color.intern(0, 255, 0)
+Color.BLACK = Color.intern(0, 0, 0)
+Color.WHITE = Color.intern(255, 255, 255)
+Color.BLUE = Color.intern(0, 0, 255)
+Color.CYAN = Color.intern(0, 255, 255)
+Color.MAGENTA = Color.intern(255, 0, 255)
+Color.SILVER = Color.intern(192, 192, 192)
+Color.GRAY = Color.intern(128, 128, 128)
+Color.MAROON = Color.intern(128, 0, 0)
+Color.OLIVE = Color.intern(128, 128, 0)
+Color.PURPLE = Color.intern(128, 0, 128)
+Color.TEAL = Color.intern(0, 128, 128)
+Color.NAVY = Color.intern(0, 0, 128)
+Color.TURQUOISE = Color.intern(64, 224, 208)
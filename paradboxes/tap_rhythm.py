@@ -0,0 +1,150 @@
+"""
+Recognize rhythms tapped on the accelerometer. Tap times go into a fixed size ring buffer and\
+every registered rhythm is checked against the newest taps as each one comes in, so a rhythm's\
+callback runs the moment its last tap lands. Nothing is allocated per tap, and each rhythm\
+usually fails on its first interval, so dozens of rhythms cost little to check.
+
+Classes:
+
+TapRhythms(capacity=32, debounce=0.05, clock=time.monotonic)
+"""
+
+import time
+from paradboxes import log
+
+logger = log.get_logger("tap_rhythm")
+
+
+class _Rhythm:
+    """
+    One registered rhythm.
+    """
+
+    __slots__ = ("name", "intervals", "tolerance", "callback")
+
+    def __init__(self, name, intervals, tolerance, callback):
+        self.name = name
+        self.intervals = intervals
+        self.tolerance = tolerance
+        self.callback = callback
+
+
+class TapRhythms:
+    """
+    Match taps against rhythms. A rhythm is the seconds between its taps, so [0.3, 0.3] is three\
+    evenly spaced taps and [] is any single tap. It matches when the intervals between the\
+    newest taps are each within its tolerance. The taps of a match are used up, so the next\
+    match needs taps after them. A tap within debounce of the tap before it is the same tap\
+    seen twice and is dropped, which replaces sleeping after each tap.
+
+    :param capacity : amount of tap times kept. Defaults to 32
+    :param debounce : seconds in which a second tap is dropped. Defaults to 0.05
+    :param clock : function returning the current time in seconds. Defaults to time.monotonic
+    """
+
+    def __init__(self, capacity=32, debounce=0.05, clock=time.monotonic):
+        self.capacity = capacity
+        self.debounce = debounce
+        self.clock = clock
+        self.rhythms = []
+        self.__times = [0.0] * capacity
+        self.__newest = -1
+        self.__count = 0
+        self.__unused = 0
+
+    def add(self, intervals, callback, tolerance=0.08, name=None):
+        """
+        Register a rhythm. Rhythms are checked in the order they were added
+
+        :param intervals : list of seconds between the taps of the rhythm
+        :param callback : callable function, called with the rhythm's name when it is tapped
+        :param tolerance : most seconds an interval may be off by. Defaults to 0.08
+        :param name : name of the rhythm. Defaults to None, which is the intervals
+        :return : name of the rhythm, for remove
+        """
+
+        intervals = tuple(intervals)
+        if len(intervals) >= self.capacity:
+            raise ValueError("A rhythm of {} taps does not fit in {} tap times".format(len(intervals) + 1,
+                                                                                     self.capacity))
+        name = name if name is not None else intervals
+        self.rhythms.append(_Rhythm(name, intervals, tolerance, callback))
+        return name
+
+    def remove(self, name):
+        """
+        Stop matching a rhythm
+
+        :param name : name returned by add
+        """
+
+        self.rhythms = [rhythm for rhythm in self.rhythms if rhythm.name != name]
+
+    def tap(self, timestamp=None):
+        """
+        Record a tap and run the callback of the first rhythm it completes
+
+        :param timestamp : time of the tap on clock. Defaults to None, which is now
+        :return : True if the tap was recorded, False if it was dropped as a bounce
+        """
+
+        if timestamp is None:
+            timestamp = self.clock()
+        times = self.__times
+        if self.__count and timestamp - times[self.__newest] < self.debounce:
+            return False
+
+        self.__newest = (self.__newest + 1) % self.capacity
+        times[self.__newest] = timestamp
+        self.__count = min(self.__count + 1, self.capacity)
+        self.__unused = min(self.__unused + 1, self.capacity)
+
+        for rhythm in self.rhythms:
+            if self.__matches(rhythm):
+                logger.info("Rhythm %s tapped", rhythm.name)
+                self.__unused = 0
+                rhythm.callback(rhythm.name)
+                break
+        return True
+
+    def __matches(self, rhythm):
+
+        intervals = rhythm.intervals
+        length = len(intervals)
+        if length >= self.__unused:
+            return False
+        times = self.__times
+        capacity = self.capacity
+        later = self.__newest
+        # Compare from the newest interval back, most rhythms fail on the first one
+        for index in range(length - 1, -1, -1):
+            earlier = (later - 1) % capacity
+            if abs(times[later] - times[earlier] - intervals[index]) > rhythm.tolerance:
+                return False
+            later = earlier
+        return True
+
+    def __len__(self):
+        return self.__count
+
+    def times(self, unused=False):
+        """
+        Get the recorded tap times, oldest first
+
+        :param unused : only the taps no rhythm has used yet. Defaults to False
+        """
+
+        count = self.__unused if unused else self.__count
+        return [self.__times[(self.__newest - index) % self.capacity] for index in range(count - 1, -1, -1)]
+
+    def reset(self):
+        """
+        Forget every recorded tap
+        """
+
+        self.__newest = -1
+        self.__count = 0
+        self.__unused = 0
+
+    def __repr__(self):
+        return "TapRhythms matching {} rhythms over the last {} taps".format(len(self.rhythms), self.capacity)
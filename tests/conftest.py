@@ -0,0 +1,10 @@
+import os
+import tempfile
+import pytest
+from paradboxes import log
+
+
+@pytest.fixture(autouse=True, scope="session")
+def test_log():
+    # Keep the classes that call log.configure() from writing log.log into the repository
+    log.configure(filename=os.path.join(tempfile.mkdtemp(), "paradboxes-test.log"))
@@ -0,0 +1,31 @@
+import numpy as np
+from paradboxes.accelerometer_stream import TapDetector, group_taps
+
+
+def still(count):
+    return np.tile([0.0, 0.0, 1.0], (count, 1))
+
+
+def test_jolt_is_one_tap():
+    samples = still(20)
+    samples[10:12, 0] = 1.5
+    detector = TapDetector(100)
+
+    taps = detector.feed(samples, end_time=1.0)
+    assert np.allclose(taps, [0.91])
+
+
+def test_tap_across_two_windows_counts_once():
+    samples = still(20)
+    samples[9:11, 0] = 1.5
+    detector = TapDetector(100)
+
+    first = detector.feed(samples[:10], end_time=0.9)
+    second = detector.feed(samples[10:], end_time=1.0)
+    assert len(first) + len(second) == 1
+
+
+def test_group_taps():
+    groups = group_taps([0.0, 0.2, 0.4, 2.0, 5.0, 5.3])
+    assert [len(group) for group in groups] == [3, 1, 2]
+    assert group_taps([]) == []
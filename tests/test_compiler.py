@@ -0,0 +1,45 @@
+import random
+import pytest
+from paradboxes import compiler
+from paradboxes.strip_control import Blink, ColorTable, DEFAULT_COLOR_TABLE
+
+
+def blink(**kwargs):
+    return Blink(None, rgb=[255, 0, 0], interval=0.1, timeout=1, **kwargs)
+
+
+def test_compile_matches_blink():
+    effect = compiler.compile_blink(blink(), use_cache=False)
+
+    assert effect.values.tolist() == [[0, 4095, 4095], [4095, 4095, 4095]] * 2
+    assert effect.duration == 0.4
+
+
+def test_cache_is_keyed_on_table_contents():
+    first = compiler.compile_blink(blink(color_table=ColorTable(gamma=2.2)))
+
+    assert compiler.compile_blink(blink(color_table=ColorTable(gamma=2.2))) is first
+    assert compiler.compile_blink(blink(color_table=ColorTable(gamma=1.8))) is not first
+
+
+def test_cache_is_bounded():
+    for timeout in range(compiler._CACHE_SIZE + 5):
+        compiler.compile_blink(Blink(None, rgb=[0, 255, 0], interval=0.1, timeout=timeout))
+
+    assert len(compiler._compiled) == compiler._CACHE_SIZE
+
+
+def test_blink_with_rng_is_not_cached():
+    first = compiler.compile_blink(Blink(None, chaos=True, timeout=3, rng=random.Random(1)))
+
+    assert compiler.compile_blink(Blink(None, chaos=True, timeout=3, rng=random.Random(1))) is not first
+
+
+def test_soft_sequence_compiles_like_its_frames():
+    colors = [[255, 0, 0], [0, 255, 0], [0, 0, 255]]
+    effect = compiler.compile_blink(Blink(None, sequence=colors, soft=True, fade_duration=0.1, timeout=0),
+                                    use_cache=False)
+
+    ends = [list(DEFAULT_COLOR_TABLE.convert(rgb)) for rgb in colors[1:] + colors[:1]]
+    assert [row for row in effect.values.tolist() if row in ends] == ends
+    assert effect.duration == pytest.approx(0.3)
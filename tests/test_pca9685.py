@@ -0,0 +1,113 @@
+import pytest
+from paradboxes.pca9685 import PWM, AsyncPWM
+from paradboxes.simulator import SimulatedBus
+
+
+@pytest.fixture
+def bus():
+    return SimulatedBus()
+
+
+@pytest.fixture
+def chip(bus):
+    return bus.attach(0x40)
+
+
+@pytest.fixture
+def pwm(bus, chip):
+    pwm = PWM(bus=bus, address=0x40)
+    pwm.setup()
+    pwm.write_all_value(0, 4095)
+    bus.reset_counters()
+    pwm.reset_counters()
+    return pwm
+
+
+def test_write_channels_is_one_block_write_per_8_channels(pwm, bus, chip):
+    pwm.write_channels(0, [[0, channel * 100] for channel in range(10)])
+
+    assert bus.transactions == 2
+    assert [chip.channel(channel) for channel in range(10)] == [[0, channel * 100] for channel in range(10)]
+
+
+def test_write_skips_unchanged_channel(pwm, bus, chip):
+    pwm.write(3, 0, 1000)
+    pwm.write(3, 0, 1000)
+
+    assert bus.transactions == 1
+    assert pwm.transactions_saved == 1
+    assert chip.channel(3) == [0, 1000]
+
+
+def test_block_write_trims_unchanged_bytes(pwm, bus):
+    pwm.write_channels(0, [[0, 4095], [0, 1000], [0, 4095]])
+
+    # Only the two off bytes of channel 1 reach the bus
+    assert bus.transactions == 1
+    assert pwm.bytes_saved == 10
+
+
+def test_frame_commit_is_one_combined_transfer(pwm, bus, chip):
+    pwm.begin_frame()
+    pwm.set(12, 100)
+    pwm.set(8, 200)
+    pwm.set(4, 300)
+    pwm.commit()
+
+    assert bus.transactions == 1
+    assert [chip.channel(12), chip.channel(8), chip.channel(4)] == [[0, 100], [0, 200], [0, 300]]
+
+
+def test_frame_commit_over_plain_smbus_joins_runs(pwm, bus, chip):
+    # As if the bus only had SMBus block writes
+    pwm._i2c_msg = None
+    pwm.begin_frame()
+    pwm.set(12, 100)
+    pwm.set(8, 200)
+    pwm.set(4, 300)
+    pwm.set(5, 400)
+    pwm.commit()
+
+    assert bus.transactions == 3
+    assert [chip.channel(channel) for channel in (12, 8, 5, 4)] == [[0, 100], [0, 200], [0, 400], [0, 300]]
+
+
+def test_nested_frames_send_on_outermost_commit(pwm, bus, chip):
+    pwm.begin_frame()
+    pwm.begin_frame()
+    pwm.set(0, 500)
+    pwm.commit()
+
+    assert bus.transactions == 0
+    pwm.commit()
+    assert bus.transactions == 1
+    assert chip.channel(0) == [0, 500]
+
+
+def test_unchanged_frame_sends_nothing(pwm, bus):
+    pwm.begin_frame()
+    pwm.set(0, 4095)
+    pwm.commit()
+
+    assert bus.transactions == 0
+
+
+def test_read_of_known_register_comes_from_cache(pwm, bus):
+    pwm._read_byte_data(PWM._MODE1)
+
+    assert bus.transactions == 0
+
+
+def test_commit_without_begin_frame(pwm):
+    with pytest.raises(RuntimeError):
+        pwm.commit()
+
+
+def test_async_write_after_close(pwm, chip):
+    writer = AsyncPWM(pwm)
+    writer.write(0, 0, 100)
+    writer.close()
+    assert chip.channel(0) == [0, 100]
+
+    with pytest.raises(IOError):
+        writer.write(0, 0, 200)
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from paradboxes.show_file import ShowFile, write_show
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "show.pbxs")
+    frames = [[0, 4095, 2048], [1, 2, 3], [4094, 17, 4000]]
+
+    assert write_show(path, iter(frames), 25, [12, 8, 4]) == 3
+    with ShowFile(path) as show:
+        assert show.channels == [12, 8, 4]
+        assert show.frame_rate == 25
+        assert list(show) == frames
+
+
+def test_round_trip_even_channels_and_arrays(tmp_path):
+    path = str(tmp_path / "show.pbxs")
+    frames = np.random.default_rng(1).integers(0, 4096, size=(50, 4))
+
+    write_show(path, frames, 50, [0, 1, 2, 3])
+    with ShowFile(path) as show:
+        assert list(show) == frames.tolist()
+
+
+@pytest.mark.parametrize("frame", [[0, 0, 5000], [0, -1, 0]])
+def test_value_out_of_range(tmp_path, frame):
+    with pytest.raises(ValueError):
+        write_show(str(tmp_path / "show.pbxs"), [frame], 25, [12, 8, 4])
+
+
+@pytest.mark.parametrize("frame", [[0, 0, 0, 0], [0, 0]])
+def test_wrong_frame_length(tmp_path, frame):
+    with pytest.raises(ValueError):
+        write_show(str(tmp_path / "show.pbxs"), [frame], 25, [12, 8, 4])
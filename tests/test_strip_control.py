@@ -0,0 +1,144 @@
+import time
+import asyncio
+import pytest
+from paradboxes.pca9685 import FrameMixin
+from paradboxes import colorspace
+from paradboxes.strip_control import AnimationRunner, Blink, Color, ColorTable, DEFAULT_COLOR_TABLE
+
+
+class RecordingPWM(FrameMixin):
+    """
+    Collects every committed frame as a {channel: off} dictionary, and runs on_commit after each one
+    """
+
+    def __init__(self):
+        self.frames = []
+        self.on_commit = None
+
+    def write(self, channel, on, off):
+        self.frames.append({channel: off})
+
+    def _commit_frame(self, frame):
+        self.frames.append({channel: off for channel, (on, off) in frame.items()})
+        if self.on_commit is not None:
+            self.on_commit()
+
+
+def played_through(pwm):
+    # Red, then black once the interval is over
+    red = tuple(DEFAULT_COLOR_TABLE.convert([255, 0, 0]))
+    black = tuple(DEFAULT_COLOR_TABLE.convert([0, 0, 0]))
+    colors = [(frame.get(12), frame.get(8), frame.get(4)) for frame in pwm.frames]
+    return red in colors and black in colors[colors.index(red):]
+
+
+def test_cancelled_blink_plays_again():
+    pwm = RecordingPWM()
+    blink = Blink(pwm, rgb=[255, 0, 0], interval=0.001, timeout=1)
+    pwm.on_commit = blink.cancel
+    blink.start()
+    assert len(pwm.frames) == 1
+
+    pwm.on_commit = None
+    pwm.frames = []
+    blink.start()
+    assert played_through(pwm)
+
+
+def test_cancel_before_start_does_not_stop_it():
+    pwm = RecordingPWM()
+    blink = Blink(pwm, rgb=[255, 0, 0], interval=0.001, timeout=1)
+    blink.cancel()
+    blink.pause()
+    blink.start()
+    assert played_through(pwm)
+
+
+def test_cancelled_blink_runs_again_on_the_event_loop():
+    pwm = RecordingPWM()
+    blink = Blink(pwm, rgb=[255, 0, 0], interval=0.001, timeout=1, frame_rate=200)
+    blink.cancel()
+    asyncio.run(blink.run())
+    assert played_through(pwm)
+
+
+def test_run_dithers_at_driver_resolution():
+    pwm = RecordingPWM()
+    blink = Blink(pwm, sequence=[[0, 0, 0], [10, 10, 10]], soft=True, fade_duration=0.2, frame_rate=100,
+                  timeout=0)
+    asyncio.run(blink.run())
+
+    # Half steps of the rgb value land between the 8 bit table's driver values
+    reds = {frame[12] for frame in pwm.frames}
+    assert reds - set(DEFAULT_COLOR_TABLE.red)
+    assert blink.pacer is not None
+
+
+def test_slow_bus_keeps_the_blink_on_time():
+    pwm = RecordingPWM()
+    pwm.on_commit = lambda: time.sleep(0.03)
+    blink = Blink(pwm, rgb=[255, 0, 0], interval=0.2, timeout=0)
+    durations = []
+    for _ in range(2):
+        started = time.monotonic()
+        blink.start()
+        durations.append(time.monotonic() - started)
+
+    # The second play runs at the lowered frame rate, with frames built for that rate
+    assert blink.pacer.frame_rate < blink.frame_rate
+    assert durations[1] < 0.55
+
+
+def test_replaced_animation_plays_again():
+    first_pwm, second_pwm = RecordingPWM(), RecordingPWM()
+    first = Blink(first_pwm, rgb=[255, 0, 0], interval=0.05, timeout=0)
+    second = Blink(second_pwm, rgb=[0, 0, 255], interval=0.05, timeout=0)
+    runner = AnimationRunner()
+    runner.play(first)
+    runner.replace(second, crossfade=0.02)
+
+    # replace waits for the cancelled animation, so nothing else is written to first_pwm until it is back
+    first_pwm.frames = []
+    runner.replace(first, crossfade=0.02)
+    assert runner.wait(5)
+    assert played_through(first_pwm)
+
+
+def test_go_to_color_after_cancel():
+    pwm = RecordingPWM()
+    blink = Blink(pwm, rgb=[255, 0, 0])
+    blink.cancel()
+    blink.go_to_color([0, 0, 0], [255, 0, 0], duration=0.02)
+    assert blink.current_color == [255, 0, 0]
+
+
+def test_cancel_straight_after_play():
+    pwm = RecordingPWM()
+    runner = AnimationRunner()
+    runner.play(Blink(pwm, rgb=[255, 0, 0], interval=5, timeout=0))
+    started = time.monotonic()
+    runner.cancel()
+    assert time.monotonic() - started < 1
+
+
+def test_color_rejects_values_outside_0_to_255():
+    with pytest.raises(ValueError):
+        Color(0, 256, 0)
+    with pytest.raises(ValueError):
+        Color.intern(-1, 0, 0)
+    with pytest.raises(ValueError):
+        Color(0.5, 0, 0)
+
+
+def test_equal_colors_hash_alike():
+    assert Color(1, 2, 3) == (1, 2, 3)
+    assert hash(Color(1, 2, 3)) == hash((1, 2, 3))
+    assert Color(1, 2, 3) in {(1, 2, 3)}
+
+
+def test_deep_color_table_takes_0_to_255_frames():
+    table = ColorTable(depth=16)
+    pwm = RecordingPWM()
+    Blink(pwm, rgb=[255, 0, 0], interval=0.02, timeout=0, color_table=table).start()
+    assert (pwm.frames[0][12], pwm.frames[0][8], pwm.frames[0][4]) == DEFAULT_COLOR_TABLE.convert([255, 0, 0])
+    assert colorspace.rgb_to_driver([255, 0, 0], table).tolist() == list(DEFAULT_COLOR_TABLE.convert([255, 0, 0]))